@@ -0,0 +1,50 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+_workers = {}
+_lock = threading.Lock()
+
+
+class BackgroundWorker:
+    """Small shared thread pool for work that must stay off the request path"""
+
+    def __init__(self, max_workers: Optional[int] = None, name: str = 'background'):
+        """
+        Args:
+            max_workers: Threads in the pool (default: VOICEMIND_BACKGROUND_WORKERS or 2)
+            name: Thread name prefix
+        """
+        self.max_workers = max_workers or int(os.getenv('VOICEMIND_BACKGROUND_WORKERS', 2))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs); errors are printed instead of being lost in the future"""
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Background task {getattr(fn, '__name__', fn)} failed: {e}")
+                raise
+        return self.executor.submit(run)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+
+
+def get_background_worker(name: str = 'background', max_workers: Optional[int] = None) -> BackgroundWorker:
+    """
+    Get a shared worker pool by name (created on first use)
+
+    Args:
+        name: Pool name; separate pools keep slow calls from starving quick tasks
+        max_workers: Pool size used when the pool is first created
+    """
+    worker = _workers.get(name)
+    if worker is None:
+        with _lock:
+            worker = _workers.get(name)
+            if worker is None:
+                worker = _workers[name] = BackgroundWorker(max_workers, name)
+    return worker
@@ -0,0 +1,249 @@
+"""
+Batch reprocessing of recorded audio clips
+
+Runs every clip through STT, crisis/guide classification and sentiment
+(plus the LLM reply and TTS when asked) with a bounded number of clips in
+flight. One JSON line per clip is appended to the output file as soon as
+the clip finishes, so an interrupted run resumes where it stopped: clips
+already recorded with status "ok" are skipped, while "degraded" clips (a
+stage timed out and its fallback was used) and "error" clips are retried.
+
+Usage:
+    python batch.py audio/ --out results.jsonl
+    python batch.py --manifest clips.txt --out results.jsonl --llm --tts --tts-dir replies/
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Iterator, List, Optional, Set
+
+import tracing
+from clients import get_openai_client, get_voice_engine, warmup
+from deadline import VOICE_STAGES, Deadline
+from guide_cache import GuideCache
+from juno_guide import JunoGuide
+from main import JunoAssistant
+from prompt import Prompts
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.flac', '.webm')
+# Offline clips have no user waiting, so each one gets far more than the interactive budget
+BATCH_BUDGET = float(os.getenv('VOICEMIND_BATCH_BUDGET', 120.0))
+
+
+def find_clips(directory: str) -> List[str]:
+    """Audio files under a directory, in a stable order"""
+    clips = []
+    for root, _, files in os.walk(directory):
+        clips += [os.path.join(root, f) for f in files if f.lower().endswith(AUDIO_EXTENSIONS)]
+    return sorted(clips)
+
+
+def read_manifest(path: str) -> List[str]:
+    """One clip path per line ('#' comments); relative paths are resolved against the manifest"""
+    base = os.path.dirname(os.path.abspath(path))
+    clips = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                clips.append(line if os.path.isabs(line) else os.path.join(base, line))
+    return clips
+
+
+def completed_clips(out_path: str) -> Set[str]:
+    """Clips already processed successfully by an earlier run (a torn last line is ignored)"""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('status') == 'ok':
+                done.add(record['path'])
+    return done
+
+
+class BatchProcessor:
+    """Processes clips on a bounded thread pool with shared clients"""
+
+    def __init__(self, llm: bool = False, tts: bool = False, tts_dir: Optional[str] = None,
+                 context: str = 'juno', timings: bool = False):
+        self.llm = llm
+        self.tts = tts
+        self.tts_dir = tts_dir
+        self.context = context
+        self.timings = timings
+        self.client = get_openai_client()
+        self.voice = get_voice_engine()
+        self.prompts = Prompts()
+        self.juno_guide = JunoGuide()
+        self.guide_cache = GuideCache(self.juno_guide.GUIDES)
+        if tts_dir:
+            os.makedirs(tts_dir, exist_ok=True)
+
+    def process(self, path: str) -> dict:
+        """Process one clip; failures are reported in the record, not raised"""
+        record = {'path': path, 'processed_at': datetime.now().isoformat()}
+        try:
+            with tracing.trace('batch.clip', enabled=self.timings or None) as trace:
+                record.update(self._process(path))
+            # A fallback reply is not a finished result, so resume retries it
+            record['status'] = 'degraded' if record.get('degraded') else 'ok'
+            if trace is not None:
+                record['timings'] = trace.timings()
+        except Exception as e:
+            record.update(status='error', error=f"{type(e).__name__}: {e}")
+        return record
+
+    def _process(self, path: str) -> dict:
+        with open(path, 'rb') as f:
+            audio = f.read()
+
+        # Every clip gets a fresh assistant so clips never share conversation memory
+        assistant = JunoAssistant(client=self.client, voice=self.voice, prompts=self.prompts,
+                                  juno_guide=self.juno_guide, guide_cache=self.guide_cache)
+        assistant.speak_replies = self.tts
+
+        deadline = Deadline(BATCH_BUDGET, VOICE_STAGES)
+        timeout = deadline.timeout('stt')
+        with tracing.span('stt'):
+            stt = self.voice.speech_to_text(audio, timeout=timeout)
+        text, lang = stt['text'], stt['language']
+        if not text:
+            raise ValueError("empty transcript")
+
+        with tracing.span('classify'):
+            if assistant._is_crisis(text):
+                route = 'crisis'
+            elif assistant._is_guide_query(text):
+                route = 'guide'
+            else:
+                route = self.context
+        sentiment = assistant._get_sentiment(text)
+        result = {
+            'text': text,
+            'lang': lang,
+            'route': route,
+            'crisis': route == 'crisis',
+            'mood': sentiment['mood'],
+            'polarity': round(sentiment['polarity'], 3),
+            'tier': assistant._detect_spiritual_tier(text, sentiment) if route == 'juno' else None
+        }
+        if route == 'guide':
+            guide = self.juno_guide.answer(text)
+            result['guide'] = {'page': guide['page'], 'intent': guide['intent'],
+                               'confidence': round(guide['confidence'], 3)}
+
+        if self.llm or route == 'crisis':
+            # Crisis replies are fixed text, so they never need the LLM
+            response = assistant.process_text(text, lang, self.context, deadline)
+            result['reply'] = response['reply']
+            result['degraded'] = response.get('degraded', [])
+            audio_out = response.get('audio')
+            if audio_out and self.tts_dir:
+                name = os.path.splitext(os.path.basename(path))[0] + '.mp3'
+                result['audio_file'] = os.path.join(self.tts_dir, name)
+                with open(result['audio_file'], 'wb') as f:
+                    f.write(audio_out)
+        return result
+
+
+def run(clips: List[str], out_path: str, processor: BatchProcessor, workers: int = 8) -> dict:
+    """
+    Process clips concurrently, appending results to out_path as they finish
+
+    At most workers * 2 clips are queued at any time, so memory stays flat
+    on large archives.
+
+    Returns:
+        dict: {'total', 'skipped', 'ok', 'degraded', 'error'}
+    """
+    done = completed_clips(out_path)
+    todo = [c for c in clips if c not in done]
+    pending = iter(todo)
+    counts = {'total': len(clips), 'skipped': len(clips) - len(todo), 'ok': 0, 'degraded': 0, 'error': 0}
+    lock = threading.Lock()
+
+    with open(out_path, 'a+', encoding='utf-8') as out:
+        # Start on a fresh line if an earlier run was killed mid-write
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != '\n':
+                out.write('\n')
+
+        def write(record: dict):
+            with lock:
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                counts[record['status']] += 1
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+            in_flight = set()
+            try:
+                for clip in _take(pending, workers * 2):
+                    in_flight.add(executor.submit(processor.process, clip))
+                while in_flight:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record = future.result()
+                        write(record)
+                        mark = {'ok': '✅', 'degraded': '⚠️'}.get(record['status'], '❌')
+                        done_count = counts['ok'] + counts['degraded'] + counts['error']
+                        print(f"{mark} {record['path']} ({done_count} done)")
+                        for clip in _take(pending, 1):
+                            in_flight.add(executor.submit(processor.process, clip))
+            except KeyboardInterrupt:
+                print("\n⏹️ Interrupted - rerun the same command to resume")
+                for future in in_flight:
+                    future.cancel()
+                raise
+    return counts
+
+
+def _take(iterator: Iterator[str], n: int) -> List[str]:
+    items = []
+    for item in iterator:
+        items.append(item)
+        if len(items) == n:
+            break
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch STT + analysis of recorded audio clips")
+    parser.add_argument('directory', nargs='?', help="Directory of audio files")
+    parser.add_argument('--manifest', help="Text file listing one clip path per line")
+    parser.add_argument('--out', default='batch_results.jsonl', help="JSONL output (appended, resumable)")
+    parser.add_argument('--workers', type=int, default=8, help="Clips processed concurrently")
+    parser.add_argument('--llm', action='store_true', help="Also generate the assistant reply")
+    parser.add_argument('--tts', action='store_true', help="Also synthesize the reply (needs --llm)")
+    parser.add_argument('--tts-dir', help="Where to write synthesized replies")
+    parser.add_argument('--context', default='juno', choices=['juno', 'coach'])
+    parser.add_argument('--timings', action='store_true', help="Record per-stage timings")
+    args = parser.parse_args()
+
+    if not args.directory and not args.manifest:
+        parser.error("give a directory or --manifest")
+    clips = read_manifest(args.manifest) if args.manifest else find_clips(args.directory)
+
+    try:
+        processor = BatchProcessor(llm=args.llm, tts=args.tts and args.llm, tts_dir=args.tts_dir,
+                                   context=args.context, timings=args.timings)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return
+    warmup(connections=True)
+
+    counts = run(clips, args.out, processor, workers=args.workers)
+    print(f"\n📦 {counts['total']} clips: {counts['ok']} ok, {counts['degraded']} degraded, "
+          f"{counts['error']} failed, {counts['skipped']} already done → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
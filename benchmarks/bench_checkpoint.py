@@ -0,0 +1,107 @@
+"""
+Journal checkpoints: resume after rapid turns with background analysis
+
+Sends turns back to back with background analysis on (so analyses land
+while later turns are being appended), simulates a crash by reopening the
+checkpoint in a new JournalAI without closing the first, and checks that
+every turn, its analysis and the session aggregate come back unchanged.
+Also reports the per-turn cost of checkpointing.
+
+Usage:
+    python benchmarks/bench_checkpoint.py [--sessions 20] [--turns 15]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from journal_final import JournalAI
+
+MESSAGES = ["I feel so lonely and exhausted lately", "my sister hasn't called me in weeks",
+            "I keep thinking I'm not good enough", "honestly today was a bit better",
+            "I don't know what to do about the move", "I miss how things used to be"]
+
+
+class FakeCompletions:
+    """Chat completions with a little latency, so analyses land while a reply is pending"""
+
+    def create(self, messages, **kwargs):
+        time.sleep(random.uniform(0, 0.003))
+        message = SimpleNamespace(content="That sounds heavy. What feels hardest right now?")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class JitteryJournal(JournalAI):
+    """Background analyses finish at random points between turns"""
+
+    def _generate_analysis(self, text):
+        time.sleep(random.uniform(0, 0.002))
+        return super()._generate_analysis(text)
+
+
+def state(journal):
+    return (journal.get_memory(), journal.phase, journal.session_analysis.to_dict(), journal.analysis)
+
+
+def run_session(path, turns, client):
+    journal = JitteryJournal(client=client, background_analysis=True)
+    journal.open_checkpoint(path)
+    for _ in range(turns):
+        journal.process_text(random.choice(MESSAGES))
+    # Settle every analysis, then "crash": the first journal is never closed
+    journal.flush_analysis()
+    journal._checkpoint()
+    live = state(journal)
+    resumed = JitteryJournal(client=client, background_analysis=True)
+    resumed.open_checkpoint(path)
+    restored = state(resumed)
+    missing = sum(1 for t in resumed.memory if t.role == 'user' and t.phase != 'crisis' and t.analysis is None)
+    resumed.close_checkpoint()
+    return live == restored, missing
+
+
+def timed_turns(turns, client, path=None):
+    journal = JournalAI(client=client)
+    if path:
+        journal.open_checkpoint(path)
+    start = time.perf_counter()
+    for _ in range(turns):
+        journal.process_text(random.choice(MESSAGES))
+    elapsed = (time.perf_counter() - start) * 1000 / turns
+    journal.close_checkpoint()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=15)
+    args = parser.parse_args()
+
+    random.seed(3)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    directory = tempfile.mkdtemp()
+    failures = 0
+    for i in range(args.sessions):
+        same, missing = run_session(os.path.join(directory, f"s{i}.jsonl"), args.turns, client)
+        if not same or missing:
+            failures += 1
+            print(f"❌ session {i}: restored state differs={not same}, user turns without analysis={missing}")
+    print(f"resume: {args.sessions - failures}/{args.sessions} sessions restored exactly")
+
+    plain = timed_turns(args.turns * 4, client)
+    checkpointed = timed_turns(args.turns * 4, client, os.path.join(directory, "timed.jsonl"))
+    print(f"turn: {plain:.2f} ms without checkpoints, {checkpointed:.2f} ms with")
+
+    if failures:
+        sys.exit(1)
+    print("\n✅ Checkpoints resume exactly")
+
+
+if __name__ == '__main__':
+    main()
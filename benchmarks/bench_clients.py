@@ -0,0 +1,76 @@
+"""
+Startup cost of JunoAssistant + CoachAI + JournalAI in one process
+
+Compares the old per-assistant wiring (every assistant builds its own OpenAI
+client and VoiceEngine) with the shared factory in clients.py. Only
+constructors run, no API calls; connection pools are counted because each
+pool keeps its own sockets once traffic flows.
+
+Usage:
+    python benchmarks/bench_clients.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+for key, value in (('OPENAI_API_KEY', 'sk-bench'), ('ELEVENLABS_API_KEY', 'bench'),
+                   ('MALE_VOICE_ID', 'male'), ('FEMALE_VOICE_ID', 'female')):
+    os.environ.setdefault(key, value)
+
+import requests
+from openai import OpenAI
+
+import clients
+from voice import VoiceEngine
+from main import JunoAssistant
+from coach_ai import CoachAI
+from journal_ai import JournalAI
+
+
+def isolated():
+    """Old wiring: every assistant owns an OpenAI client and a VoiceEngine"""
+    config = clients.get_config()
+
+    def own_voice():
+        return VoiceEngine(config=config, openai_client=OpenAI(api_key=config.openai_api_key),
+                           session=requests.Session())
+
+    return [
+        JunoAssistant(client=OpenAI(api_key=config.openai_api_key), voice=own_voice()),
+        CoachAI(client=OpenAI(api_key=config.openai_api_key), voice=own_voice()),
+        JournalAI(client=OpenAI(api_key=config.openai_api_key), voice=own_voice())
+    ]
+
+
+def shared():
+    """New wiring: one config, one OpenAI client and one VoiceEngine per process"""
+    clients.reset_clients()
+    return [JunoAssistant(), CoachAI(), JournalAI()]
+
+
+def count_pools(assistants):
+    openai_clients = set()
+    http_sessions = set()
+    for a in assistants:
+        openai_clients.add(id(a.client))
+        openai_clients.add(id(a.voice.openai_client))
+        http_sessions.add(id(a.voice.session))
+    return len(openai_clients), len(http_sessions)
+
+
+def measure(build, runs=20):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        assistants = build()
+        best = min(best, time.perf_counter() - start)
+    return best, count_pools(assistants)
+
+
+if __name__ == "__main__":
+    for name, build in (('before (isolated)', isolated), ('after (shared)', shared)):
+        seconds, (openai_pools, http_pools) = measure(build)
+        print(f"{name:18s} startup {seconds * 1000:7.1f} ms | "
+              f"OpenAI pools: {openai_pools} | ElevenLabs pools: {http_pools}")
@@ -0,0 +1,104 @@
+"""
+Crisis detection: shared CrisisDetector vs the per-call keyword checks
+
+Replays benchmarks/crisis_corpus.txt (plus every consecutive pair joined by
+a newline) through the old implementations and the compiled detectors,
+fails if any verdict differs, then times both.
+
+Usage:
+    python benchmarks/bench_crisis.py [--repeat 20]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from journal_final import JournalAI as FinalJournal
+from main import JunoAssistant
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crisis_corpus.txt')
+
+# no/sentiment.py keeps its own (shorter) keyword list
+SENTIMENT_KEYWORDS = ['suicide', 'kill myself', 'end it all', 'hurt myself',
+                      'self harm', 'cutting', 'die', 'worthless']
+
+
+def old_substring(keywords):
+    """main.py, journal_ai.py and no/sentiment.py before the detector"""
+    def is_crisis(text):
+        return any(k in text.lower() for k in keywords)
+    return is_crisis
+
+
+def old_journal_final(text):
+    """journal_final.JournalAI._is_crisis before the detector"""
+    if not text or not isinstance(text, str):
+        return False
+    t = text.lower().strip()
+    for neg in FinalJournal.NEGATION_WORDS:
+        if re.search(r'\b' + re.escape(neg) + r'\b.*\b(die|kill|suicide|suicid|end my life|harm)\b', t):
+            return False
+    explicit_phrases = [
+        "i want to die", "i want to kill myself", "i want to suicide",
+        "i'm going to kill myself", "i'm going to end my life",
+        "i'm going to die", "i plan to kill", "will kill myself"
+    ]
+    for phrase in explicit_phrases:
+        if phrase in t:
+            return True
+    for kw in FinalJournal.CRISIS_KEYWORDS:
+        if re.search(r'\b' + re.escape(kw.lower()) + r'\b', t):
+            return True
+    return False
+
+
+def load_corpus():
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+    return lines + [a + '\n' + b for a, b in zip(lines, lines[1:])]
+
+
+def timed(fn, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from crisis_detector import CrisisDetector
+    texts = load_corpus()
+    cases = [
+        ('journal_final', old_journal_final, FinalJournal.CRISIS_DETECTOR.is_crisis),
+        ('main/journal_ai', old_substring(JunoAssistant.CRISIS_KEYWORDS), JunoAssistant.CRISIS_DETECTOR.is_crisis),
+        ('no/sentiment', old_substring(SENTIMENT_KEYWORDS),
+         CrisisDetector(SENTIMENT_KEYWORDS, word_boundaries=False).is_crisis),
+    ]
+
+    failed = False
+    print(f"{len(texts)} messages\n")
+    print(f"{'detector':<18}{'crisis':>8}{'old us':>10}{'new us':>10}{'speedup':>10}")
+    for name, old, new in cases:
+        mismatches = [t for t in texts if old(t) != new(t)]
+        for t in mismatches:
+            print(f"❌ {name}: verdict differs for {t!r} (old={old(t)})")
+        failed |= bool(mismatches)
+        old_us, new_us = timed(old, texts, args.repeat), timed(new, texts, args.repeat)
+        crisis = sum(map(new, texts))
+        print(f"{name:<18}{crisis:>8}{old_us:>10.2f}{new_us:>10.2f}{old_us / new_us:>9.1f}x")
+
+    if failed:
+        sys.exit(1)
+    print("\n✅ Verdicts identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Long-term memory recall latency as the memory log grows
+
+Builds memory logs of synthetic turns and times JunoAssistant._recall(),
+including the one-off index build (a background job in the assistant,
+waited for here). A brute-force cosine scan over every turn is timed for
+comparison.
+
+Usage:
+    python benchmarks/bench_recall.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from main import JunoAssistant
+from memory_store import MemoryLog
+from text_index import HashingVectorizer
+
+TOPICS = [
+    "my sister and I had a fight about {x}", "I keep worrying about {x} at work",
+    "I prayed about {x} last night", "I can't sleep because of {x}",
+    "my goal this week is {x}", "I feel lonely since {x}", "church felt different after {x}",
+    "I'm anxious about the exam on {x}", "my dad's health and {x}", "I forgave my friend for {x}"
+]
+WORDS = ("money moving house breakup promotion deadline surgery wedding debt exams chemistry "
+         "grandmother puppy garden marathon guitar job interview rent scholarship roommate").split()
+# Long tail of rarer words, drawn with a Zipf-like distribution like real conversation
+WORDS += [f"word{i}" for i in range(3000)]
+WEIGHTS = [1.0 / (rank + 1) for rank in range(len(WORDS))]
+QUERIES = ["how do I stop worrying about my job interview", "I had another fight with my sister",
+           "still can't sleep, the rent is due", "thinking about my grandmother again"]
+
+
+def make_turn(rng: random.Random) -> dict:
+    x = ' '.join(rng.choices(WORDS, weights=WEIGHTS, k=3))
+    return {'timestamp': '', 'user': rng.choice(TOPICS).format(x=x), 'assistant': 'I hear you.',
+            'sentiment': {'mood': 'neutral', 'polarity': 0.0}, 'lang': 'en', 'ai_type': 'juno', 'tier': 2}
+
+
+def brute_force(log: MemoryLog, text: str, k: int):
+    vectorizer = HashingVectorizer(char_ngram=0)
+    q = vectorizer.features(text)
+    scores = []
+    for seq, entry in enumerate(log.iter_turns()):
+        d = vectorizer.features(entry['user'])
+        dot = sum(v * d.get(f, 0.0) for f, v in q.items())
+        norm = (sum(v * v for v in q.values()) * sum(v * v for v in d.values())) ** 0.5
+        scores.append((dot / norm if norm else 0.0, seq))
+    return sorted(scores, reverse=True)[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    tmp = tempfile.mkdtemp(prefix='bench_recall_')
+    print(f"{'turns':>8}{'build ms':>11}{'recall ms':>11}{'brute ms':>11}{'index MB':>10}")
+    for size in args.sizes:
+        path = os.path.join(tmp, f"mem_{size}.jsonl")
+        log = MemoryLog(path)
+        for _ in range(size):
+            log.append_turn(make_turn(rng))
+        log.close()
+
+        assistant = JunoAssistant.__new__(JunoAssistant)
+        assistant.memory_log = MemoryLog(path)
+        assistant.memory = assistant.memory_log.read_turns(-JunoAssistant.MEMORY_WINDOW)
+        assistant._memory_index = None
+        assistant._index_job = None
+
+        # Built on a background worker; wait for it here to time the build
+        start = time.perf_counter()
+        assistant._get_memory_index(timeout=None)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(20):
+            for q in QUERIES:
+                hits = assistant._recall(q)
+        recall_ms = (time.perf_counter() - start) * 1000 / (20 * len(QUERIES))
+        assert hits, "recall returned nothing"
+
+        start = time.perf_counter()
+        brute_force(assistant.memory_log, QUERIES[0], JunoAssistant.RECALL_K)
+        brute_ms = (time.perf_counter() - start) * 1000
+
+        mb = assistant._memory_index.nbytes / 1e6
+        print(f"{size:>8}{build_ms:>11.1f}{recall_ms:>11.2f}{brute_ms:>11.1f}{mb:>10.1f}")
+        assistant.memory_log.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Import time and first-request latency for every entry point
+
+Each measurement runs in a fresh interpreter so module caches start cold.
+The OpenAI client and VoiceEngine are replaced by in-process fakes, so the
+first-request number is the local one-time work (library imports, sentiment
+lexicon, tokenizer) a user would otherwise pay for on top of the API calls.
+"cold" is the first request straight after import; "warm" runs
+clients.warmup(connections=False) beforehand. The service always warms up
+in its startup hook, so its "cold" request is already warm.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ENTRY_POINTS = {
+    'main': ('from main import JunoAssistant',
+             'a = JunoAssistant(client=client, voice=voice)',
+             'a.process_text("I feel a bit low today", "en", "juno")'),
+    'coach_ai': ('from coach_ai import CoachAI',
+                 'a = CoachAI(client=client, voice=voice)',
+                 'a.process_text("I feel a bit low today", "en", "female")'),
+    'journal_ai': ('from journal_ai import JournalAI',
+                   'a = JournalAI(client=client, voice=voice)',
+                   'a.process_text("I feel a bit low today", "en")'),
+    'journal_final': ('from journal_final import JournalAI',
+                      'a = JournalAI(client=client)',
+                      'a.process_text("I feel a bit low today", "en")'),
+    'service': ('import service; from fastapi.testclient import TestClient',
+                'clients._openai_client, clients._voice_engine = client, voice; '
+                'a = TestClient(service.app); a.__enter__()',
+                'a.post("/coach/text", json={"user_id": "u1", "text": "I feel a bit low today"})'),
+}
+
+CHILD = '''
+import os, sys, time, json
+from types import SimpleNamespace
+sys.path.insert(0, {root!r})
+for key, value in (('OPENAI_API_KEY', 'sk-bench'), ('ELEVENLABS_API_KEY', 'bench'),
+                   ('MALE_VOICE_ID', 'male'), ('FEMALE_VOICE_ID', 'female')):
+    os.environ.setdefault(key, value)
+os.environ['VOICEMIND_WARMUP_CONNECTIONS'] = '0'
+os.chdir({tmp!r})
+
+class FakeCompletions:
+    def create(self, **kwargs):
+        message = SimpleNamespace(content="That sounds hard. I'm here with you.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+class FakeVoice:
+    def speech_to_text(self, audio, timeout=None):
+        return {{'text': 'hello', 'language': 'en'}}
+    def text_to_speech(self, text, language='en', gender='female', timeout=None):
+        return b''
+
+client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+voice = FakeVoice()
+
+start = time.perf_counter()
+{imports}
+import clients
+import_s = time.perf_counter() - start
+{construct}
+warmup_s = 0.0
+if {warm}:
+    start = time.perf_counter()
+    clients.warmup(connections=False)
+    warmup_s = time.perf_counter() - start
+start = time.perf_counter()
+{request}
+first_s = time.perf_counter() - start
+print(json.dumps({{'import': import_s, 'warmup': warmup_s, 'first': first_s}}))
+'''
+
+
+def run_child(name: str, warm: bool, tmp: str) -> dict:
+    imports, construct, request = ENTRY_POINTS[name]
+    code = CHILD.format(root=os.path.abspath(ROOT), tmp=tmp, imports=imports,
+                        construct=construct, warm=warm, request=request)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    import tempfile
+    tmp = tempfile.mkdtemp(prefix='bench_startup_')
+
+    print(f"{'entry point':<15}{'import ms':>11}{'cold 1st ms':>13}{'warmup ms':>11}{'warm 1st ms':>13}")
+    for name in ENTRY_POINTS:
+        cold = [run_child(name, False, tmp) for _ in range(args.runs)]
+        warm = [run_child(name, True, tmp) for _ in range(args.runs)]
+        best = lambda runs, key: min(r[key] for r in runs) * 1000
+        print(f"{name:<15}{best(cold, 'import'):>11.1f}{best(cold, 'first'):>13.1f}"
+              f"{best(warm, 'warmup'):>11.1f}{best(warm, 'first'):>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Theme extraction and cross-session trend queries
+
+Checks that ThemeMatcher finds exactly the themes of the old per-theme
+substring scan (on the crisis corpus plus synthetic journal lines) and
+times both, then fills a TrendStore with years of sessions per user and
+times "themes over the last 30 days" queries.
+
+Usage:
+    python benchmarks/bench_themes.py [--users 1000] [--sessions 3000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from theme_store import DAY, THEMES, ThemeMatcher, TrendStore
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crisis_corpus.txt')
+FRAGMENTS = ["I feel so alone lately", "my breakup still hurts", "work is too much", "I don't know anymore",
+             "I'm such a failure", "I miss my dad", "I'm lost", "today was fine", "we went to church",
+             "I can't handle the noise", "I feel isolated and exhausted", "missing home", "not good enough"]
+
+
+def old_themes(text):
+    """journal_final._generate_analysis theme scan before the matcher"""
+    text_lower = text.lower()
+    return [theme for theme, keywords in THEMES.items() if any(kw in text_lower for kw in keywords)]
+
+
+def timed(fn, texts, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--sessions', type=int, default=3000, help="Sessions per user")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        texts = [line.rstrip('\n') for line in f if line.strip() and not line.startswith('#')]
+    texts += [' '.join(rng.sample(FRAGMENTS, rng.randint(1, 4))) + '.' for _ in range(500)]
+
+    matcher = ThemeMatcher()
+    mismatches = [t for t in texts if matcher.match(t) != old_themes(t)]
+    for t in mismatches:
+        print(f"❌ themes differ for {t!r}: {old_themes(t)} vs {matcher.match(t)}")
+    print(f"themes: {len(texts)} texts, old {timed(old_themes, texts):.2f} us, "
+          f"matcher {timed(matcher.match, texts):.2f} us per text")
+
+    store = TrendStore(matcher)
+    now = time.time()
+    start = time.perf_counter()
+    for u in range(args.users):
+        ts = now - DAY * 365 * 3
+        for _ in range(args.sessions):
+            ts += rng.expovariate(args.sessions / (DAY * 365 * 3))
+            store.add_mask(f"user{u}", rng.uniform(-1, 1), rng.getrandbits(len(THEMES)), ts)
+    build_s = time.perf_counter() - start
+    print(f"\ntrend store: {len(store)} sessions, {store.nbytes() / 1e6:.1f} MB, built in {build_s:.1f} s")
+
+    users = [f"user{rng.randrange(args.users)}" for _ in range(200)]
+    for name, query in (("theme_counts(30d)", lambda u: store.theme_counts(u, 30, now)),
+                        ("theme_counts(all)", lambda u: store.theme_counts(u, None, now)),
+                        ("daily(30d)", lambda u: store.daily(u, 30, now)),
+                        ("summary(365d)", lambda u: store.summary(u, 365, now))):
+        start = time.perf_counter()
+        for u in users:
+            query(u)
+        print(f"{name:<20}{(time.perf_counter() - start) * 1000 / len(users):8.3f} ms/query")
+
+    if mismatches:
+        sys.exit(1)
+    print("\n✅ Themes identical")
+
+
+if __name__ == '__main__':
+    main()
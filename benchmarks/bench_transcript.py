@@ -0,0 +1,95 @@
+"""
+Journal transcript: phase-indexed Transcript vs the old list of dicts
+
+Replays long journal sessions through both structures, checks that they
+build the same prompt context and phase sequence, and reports per-turn
+bookkeeping time and the RAM held per session.
+
+Usage:
+    python benchmarks/bench_transcript.py [--turns 50 500 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from context_builder import ContextBuilder
+from journal_final import JournalAI
+from transcript import Transcript
+
+PHASES = ['feel', 'understand', 'relieve']
+MESSAGES = ["I feel so tired of everything at work lately", "my sister hasn't called me in weeks",
+            "I keep thinking I'm not good enough", "honestly today was a bit better",
+            "I don't know what to do about the move", "I miss how things used to be"]
+
+
+def next_phase(phase, count):
+    idx = PHASES.index(phase)
+    return PHASES[min(idx + 1, len(PHASES) - 1)] if count >= 4 else phase
+
+
+def run_old(texts, builder):
+    """journal_final before the Transcript"""
+    memory, phase, contexts = [], 'feel', []
+    for text in texts:
+        memory.append({'role': 'user', 'text': text, 'sentiment': 'neutral', 'phase': phase})
+        lines = [f"{m['role'].title()}: {m['text']}" for m in memory[-JournalAI.MAX_CONTEXT_MESSAGES:]]
+        contexts.append(builder.fit_lines(lines, reserved=60)[0])
+        memory.append({'role': 'therapist', 'text': "That sounds heavy. What's the hardest part?", 'phase': phase})
+        phase = next_phase(phase, sum(1 for m in memory if m.get('phase') == phase))
+    return memory, contexts
+
+
+def run_new(texts, builder):
+    memory, phase, contexts = Transcript(JournalAI.MAX_CONTEXT_MESSAGES, builder.prepare_line), 'feel', []
+    for text in texts:
+        memory.append('user', text, phase, 'neutral')
+        contexts.append(builder.fit_prepared(memory.recent(), reserved=60)[0])
+        memory.append('therapist', "That sounds heavy. What's the hardest part?", phase)
+        phase = next_phase(phase, memory.count(phase))
+    return memory, contexts
+
+
+def measure(run, texts, builder):
+    start = time.perf_counter()
+    run(texts, builder)
+    per_turn_us = (time.perf_counter() - start) * 1e6 / len(texts)
+
+    # Only the transcript survives the call, so that is what gets counted.
+    # Drain CPython's dict free lists first: dicts reused from them are not
+    # traced, which made short sessions of the old structure look smaller
+    drain = [{'': i} for i in range(256)]
+    tracemalloc.start()
+    memory = run(texts, builder)[0]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del drain
+    return per_turn_us, size, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turns', type=int, nargs='+', default=[50, 500, 2000])
+    args = parser.parse_args()
+
+    builder = ContextBuilder(JournalAI.CONTEXT_BUDGET)
+    rng = random.Random(3)
+    print(f"{'turns':>7}{'old us/turn':>13}{'new us/turn':>13}{'old KB':>9}{'new KB':>9}")
+    for n in args.turns:
+        # Distinct strings per turn, like real input
+        texts = [f"{rng.choice(MESSAGES)} ({i})" for i in range(n)]
+        assert run_old(texts, builder)[1] == run_new(texts, builder)[1], "context differs"
+
+        old_us, old_bytes, old_memory = measure(run_old, texts, builder)
+        new_us, new_bytes, new_memory = measure(run_new, texts, builder)
+        assert old_memory == [t.to_dict() for t in new_memory], "transcript differs"
+        print(f"{n:>7}{old_us:>13.1f}{new_us:>13.1f}{old_bytes / 1024:>9.1f}{new_bytes / 1024:>9.1f}")
+    print("\n✅ Same context and phases")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from memory_store import MemoryLog
+
+
+class SessionCheckpoint:
+    """
+    Incremental on-disk snapshot of one conversation session
+
+    Each save appends only the turns added since the last one, plus a small
+    'checkpoint' state record that supersedes the previous one (compaction
+    keeps just the newest). A restarted worker rebuilds the session from
+    the file without calling the LLM or re-running sentiment.
+    """
+
+    def __init__(self, filepath: str):
+        """
+        Args:
+            filepath: JSONL file for this session (created on first save)
+        """
+        self.filepath = filepath
+        self.log = MemoryLog(filepath) if os.path.exists(filepath) else None
+        self.written = len(self.log) if self.log is not None else 0
+
+    def save(self, new_turns: Sequence[dict], state: dict):
+        """
+        Persist the turns added since the last save and the current session state
+
+        Args:
+            new_turns: Turns after the first `written` ones, oldest first
+            state: Everything else needed to resume (phase, counters, ...)
+        """
+        if self.log is None:
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.log = MemoryLog(self.filepath)
+        for entry in new_turns:
+            self.log.append_turn(entry)
+        self.written += len(new_turns)
+        self.log.append('checkpoint', state)
+
+    def restore(self) -> Tuple[List[dict], Optional[dict]]:
+        """
+        Returns:
+            tuple: (turns, state), or ([], None) if nothing was checkpointed
+        """
+        if self.log is None:
+            return [], None
+        state = self.log.latest('checkpoint')
+        if state is None:
+            return [], None
+        return list(self.log.iter_turns()), state
+
+    def discard(self):
+        """Delete the snapshot (the session ended); the next save starts a new one"""
+        self.close()
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+        self.written = 0
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from dotenv import load_dotenv
+
+# openai and requests are imported on first use so entry points start fast
+if TYPE_CHECKING:
+    import requests
+    from openai import OpenAI
+
+
+class Config:
+    """Settings read once from the environment / .env file"""
+
+    def __init__(self):
+        load_dotenv()
+        self.openai_api_key = os.getenv('OPENAI_API_KEY')
+        self.elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
+        self.male_voice_id = os.getenv('MALE_VOICE_ID')
+        self.female_voice_id = os.getenv('FEMALE_VOICE_ID')
+        self.http_pool_size = int(os.getenv('HTTP_POOL_SIZE', 32))
+        # Requests carry their own deadline, so a timed-out call is not retried by default
+        self.openai_max_retries = int(os.getenv('OPENAI_MAX_RETRIES', 0))
+
+
+_lock = threading.Lock()
+_config = None
+_openai_client = None
+_http_session = None
+_voice_engine = None
+
+
+def get_config() -> Config:
+    """Process-wide configuration"""
+    global _config
+    with _lock:
+        if _config is None:
+            _config = Config()
+        return _config
+
+
+def get_openai_client() -> 'OpenAI':
+    """Process-wide OpenAI client (one connection pool shared by every assistant)"""
+    global _openai_client
+    config = get_config()
+    with _lock:
+        if _openai_client is None:
+            if not config.openai_api_key:
+                raise ValueError("❌ OPENAI_API_KEY not found in .env file!")
+            from openai import OpenAI
+            _openai_client = OpenAI(api_key=config.openai_api_key, max_retries=config.openai_max_retries)
+        return _openai_client
+
+
+def get_http_session() -> 'requests.Session':
+    """Process-wide keep-alive HTTP session for ElevenLabs calls"""
+    global _http_session
+    config = get_config()
+    with _lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.http_pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
+
+
+def get_voice_engine():
+    """Process-wide VoiceEngine built on the shared config, OpenAI client and HTTP session"""
+    global _voice_engine
+    from voice import VoiceEngine
+
+    config = get_config()
+    openai_client = get_openai_client()
+    session = get_http_session()
+    with _lock:
+        if _voice_engine is None:
+            _voice_engine = VoiceEngine(config=config, openai_client=openai_client, session=session)
+        return _voice_engine
+
+
+def reset_clients():
+    """Drop the shared instances (e.g. after changing the environment)"""
+    global _config, _openai_client, _http_session, _voice_engine
+    with _lock:
+        if _http_session is not None:
+            _http_session.close()
+        _config = _openai_client = _http_session = _voice_engine = None
+
+
+def warmup(connections: bool = True) -> dict:
+    """
+    Pay one-time startup costs before the first user request
+
+    Loads the sentiment lexicon and tokenizer, builds the shared clients and,
+    with connections=True, opens the TLS connections to OpenAI and ElevenLabs
+    so they sit in the keep-alive pools. Failures are reported, not raised.
+
+    Returns:
+        dict: Seconds spent per step (None for a step that failed)
+    """
+    import nlp
+    from context_builder import count_tokens
+
+    steps = [('sentiment', nlp.warmup), ('tokenizer', lambda: count_tokens("warmup"))]
+    config = get_config()
+    if config.openai_api_key:
+        steps.append(('openai_client', get_openai_client))
+        if connections:
+            steps.append(('openai_connection',
+                          lambda: get_openai_client().with_options(timeout=5.0).models.list()))
+    if config.elevenlabs_api_key:
+        steps.append(('http_session', get_http_session))
+        if connections:
+            steps.append(('elevenlabs_connection', lambda: get_http_session().get(
+                'https://api.elevenlabs.io/v1/models',
+                headers={'xi-api-key': config.elevenlabs_api_key}, timeout=5.0)))
+
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        try:
+            step()
+            timings[name] = time.perf_counter() - start
+        except Exception as e:
+            print(f"⚠️ Warmup step '{name}' failed: {e}")
+            timings[name] = None
+    return timings
@@ -1,27 +1,70 @@
-import os
+import threading
+from collections import deque
+from concurrent.futures import wait
 from datetime import datetime
-from typing import Dict, Optional
-from dotenv import load_dotenv
-from openai import OpenAI
-from textblob import TextBlob
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import nlp
+import tracing
+from background import BackgroundWorker, get_background_worker
 from voice import VoiceEngine
 from prompt import Prompts
+from context_builder import ContextBuilder
+from clients import get_openai_client, get_voice_engine, warmup
+from deadline import TEXT_BUDGET, Deadline, speak
+from history_store import HistoryStore, MemoryHistoryStore
+from lazy_audio import LazyAudio
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 class CoachAI:
     """Scalable Christian Life Coach AI with flexible voice and text support"""
     
-    def __init__(self):
-        """Initialize Coach AI with voice engine and OpenAI client"""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("❌ OPENAI_API_KEY not found in .env file!")
+    CONTEXT_BUDGET = 900
+    MAX_CONTEXT_TURNS = 20
+    # Most history entries scored by one background sentiment job
+    SENTIMENT_BATCH = 32
+    # How long closing a session waits for sentiment still being scored
+    SENTIMENT_FLUSH_TIMEOUT = 5.0
+    
+    def __init__(self, client: Optional['OpenAI'] = None, voice: Optional[VoiceEngine] = None,
+                 prompts: Optional[Prompts] = None, sentiment: bool = True,
+                 worker: Optional[BackgroundWorker] = None, lazy_audio: Optional[LazyAudio] = None,
+                 history: Optional[HistoryStore] = None, user_id: str = 'default'):
+        """
+        Initialize Coach AI with voice engine and OpenAI client
         
-        self.client = OpenAI(api_key=api_key)
-        self.voice = VoiceEngine()
-        self.prompts = Prompts()
-        self.conversation_history = []
+        Args:
+            client, voice: Default to the process-wide instances from clients.py
+            prompts: Shared Prompts instance (created when not given)
+            sentiment: Score each message's sentiment after the reply is sent and
+                store it in its history entry (off the request path)
+            worker: BackgroundWorker for the sentiment jobs (default: the shared 'sentiment' pool)
+            lazy_audio: Where text-mode replies are synthesized on first fetch
+                (default: a store of this session's own)
+            history: Where conversation entries are kept (default: this process's memory;
+                the service passes a shared SQLiteHistoryStore)
+            user_id: Whose history this session reads and writes
+        """
+        self.client = client or get_openai_client()
+        self.voice = voice or get_voice_engine()
+        self.prompts = prompts or Prompts()
+        self.lazy_audio = lazy_audio or LazyAudio(self.voice)
+        self.sentiment = sentiment
+        self.worker = worker
+        self._sentiment_lock = threading.Lock()
+        self._sentiment_queue: List[Tuple[int, str]] = []
+        self._sentiment_job = None
+        self.context_builder = ContextBuilder(self.CONTEXT_BUDGET)
+        self.last_context_tokens = 0
+        self.history = history or MemoryHistoryStore()
+        self.user_id = user_id
+        # Only the turns the prompt needs stay in RAM; the rest is read from the store on demand
+        self.recent_turns = deque(((e['user_text'], e['coach_reply'])
+                                   for e in self.history.last(user_id, self.MAX_CONTEXT_TURNS)),
+                                  maxlen=self.MAX_CONTEXT_TURNS)
+        self.message_count = self.history.count(user_id)
+        self.languages_used = set(self.history.languages(user_id))
         self.user_context = {
             'lang': 'en',
             'gender_preference': 'female',
@@ -30,7 +73,8 @@ class CoachAI:
         }
         print("✅ CoachAI initialized successfully")
     
-    def process_voice(self, audio_data: bytes, lang: str = 'en', gender: str = 'female') -> Dict:
+    def process_voice(self, audio_data: bytes, lang: str = 'en', gender: str = 'female',
+                      deadline: Optional[Deadline] = None) -> Dict:
         """
         Process voice input and return voice + text response
         Uses Guided Micro-Step Coaching approach (under 70 words, empathetic, actionable)
@@ -39,36 +83,31 @@ class CoachAI:
             audio_data: Audio bytes (WAV format)
             lang: 'en', 'hi', or 'pt' - user selected language
             gender: 'male' or 'female' - user selected voice gender
+            deadline: Request budget split across STT/LLM/TTS (default: Deadline.for_voice())
         
         Returns:
-            dict: {text_input, coach_reply, audio_reply, sentiment, lang, gender}
+            dict: {text_input, coach_reply, audio_reply, audio_id (None), lang, gender, degraded}
+                plus 'timings' when the request is traced
         """
-        stt_result = self.voice.speech_to_text(audio_data)
-        user_text = stt_result['text']
-        detected_lang = stt_result['language']
-        
-        if not user_text:
-            return self._error_response("I couldn't hear you clearly", lang, gender)
-        lang = detected_lang if detected_lang else lang
-        self.user_context['lang'] = lang
-        self.user_context['gender_preference'] = gender
-        coach_reply = self._generate_coach_response(user_text, lang)
-        audio_reply = self.voice.text_to_speech(coach_reply, lang, gender)
-        sentiment = self._get_sentiment(user_text)
-        
-        self._save_conversation(user_text, coach_reply, lang, 'voice', None)
-        
-        return {
-            'type': 'voice',
-            'text_input': user_text,
-            'coach_reply': coach_reply,
-            'audio_reply': audio_reply,
-            'lang': lang,
-            'gender': gender,
-            'timestamp': datetime.now().isoformat()
-        }
+        deadline = deadline or Deadline.for_voice()
+        with tracing.trace('coach.voice') as trace:
+            timeout = deadline.timeout('stt')
+            with tracing.span('stt'):
+                stt_result = self.voice.speech_to_text(audio_data, timeout=timeout) if timeout else {'text': '', 'language': lang}
+            user_text = stt_result['text']
+            detected_lang = stt_result['language']
+            
+            if not user_text:
+                deadline.degrade('stt')
+                result = self._error_response("I couldn't hear you clearly", lang, gender, deadline)
+            else:
+                result = self._respond(user_text, detected_lang or lang, gender, 'voice', deadline, True)
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
     
-    def process_text(self, user_text: str, lang: str = 'en', gender: str = 'female') -> Dict:
+    def process_text(self, user_text: str, lang: str = 'en', gender: str = 'female',
+                     deadline: Optional[Deadline] = None, inline_audio: bool = False) -> Dict:
         """
         Process text input and return text + voice response
         Uses Guided Micro-Step Coaching approach (under 70 words, empathetic, actionable)
@@ -77,33 +116,51 @@ class CoachAI:
             user_text: User input text
             lang: 'en', 'hi', or 'pt' - user selected language
             gender: 'male' or 'female' - user selected voice gender
+            deadline: Request budget (default: all of it for the LLM, or split across
+                LLM/TTS with inline_audio)
+            inline_audio: Synthesize the reply now and return it in audio_reply;
+                otherwise audio_reply is None and audio_id fetches it via get_audio()
         
         Returns:
-            dict: {text_input, coach_reply, audio_reply, sentiment, lang, gender}
+            dict: {text_input, coach_reply, audio_reply, audio_id, lang, gender, degraded}
+                plus 'timings' when the request is traced
         """
+        deadline = deadline or (Deadline.for_text() if inline_audio else Deadline(TEXT_BUDGET, stages=('llm',)))
         if not user_text or not user_text.strip():
-            return self._error_response("Please share what's on your mind", lang, gender)
+            return self._error_response("Please share what's on your mind", lang, gender, deadline, inline_audio)
         
-        user_text = user_text.strip()
+        with tracing.trace('coach.text') as trace:
+            result = self._respond(user_text.strip(), lang, gender, 'text', deadline, inline_audio)
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
+    
+    def _respond(self, user_text: str, lang: str, gender: str, input_type: str, deadline: Deadline,
+                 inline_audio: bool) -> Dict:
+        """Shared LLM → TTS → save steps of the voice and text pipelines"""
         self.user_context['lang'] = lang
         self.user_context['gender_preference'] = gender
-        coach_reply = self._generate_coach_response(user_text, lang)
-        audio_reply = self.voice.text_to_speech(coach_reply, lang, gender)
-        sentiment = self._get_sentiment(user_text)
+        coach_reply = self._generate_coach_response(user_text, lang, deadline)
+        audio_reply, audio_id = self._reply_audio(coach_reply, lang, gender, deadline, inline_audio)
         
-        self._save_conversation(user_text, coach_reply, lang, 'text', None)
+        entry = self._save_conversation(user_text, coach_reply, lang, input_type, None)
+        if self.sentiment:
+            self._queue_sentiment(entry)
         
         return {
-            'type': 'text',
+            'type': input_type,
             'text_input': user_text,
             'coach_reply': coach_reply,
             'audio_reply': audio_reply,
+            'audio_id': audio_id,
             'lang': lang,
             'gender': gender,
+            'context_tokens': self.last_context_tokens,
+            'degraded': deadline.degraded,
             'timestamp': datetime.now().isoformat()
         }
     
-    def _generate_coach_response(self, user_text: str, lang: str) -> str:
+    def _generate_coach_response(self, user_text: str, lang: str, deadline: Deadline) -> str:
         """
         Generate personalized coaching response using exact coach prompt from Prompts.COACH
         Guided Micro-Step Coaching style: empathy + 2-3 tiny doable actions
@@ -111,57 +168,131 @@ class CoachAI:
         Args:
             user_text: User input
             lang: Language code ('en', 'hi', 'pt')
+            deadline: Request budget; the fallback reply is used once the LLM stage runs out
         
         Returns:
             str: Coaching response (under 70 words as per prompt)
         """
         system_prompt = Prompts.get('coach', lang)
         
-        messages = [{'role': 'system', 'content': system_prompt}]
-        recent_history = self.conversation_history[-4:] if len(self.conversation_history) > 0 else []
-        for entry in recent_history:
-            messages.append({'role': 'user', 'content': entry['user_text']})
-            messages.append({'role': 'assistant', 'content': entry['coach_reply']})
-        
-        messages.append({'role': 'user', 'content': user_text})
+        with tracing.span('context'):
+            messages, self.last_context_tokens = self.context_builder.build_messages(
+                [system_prompt], list(self.recent_turns), user_text)
         
-        response = self.client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=messages,
-            max_tokens=80,
-            temperature=0.7
-        )
+        timeout = deadline.timeout('llm')
+        if timeout:
+            try:
+                with tracing.span('llm') as span:
+                    response = self.client.chat.completions.create(
+                        model='gpt-4o-mini',
+                        messages=messages,
+                        max_tokens=80,
+                        temperature=0.7,
+                        timeout=timeout
+                    )
+                    tracing.record_usage(span, response)
+                return response.choices[0].message.content
+            except Exception as e:
+                print(f"❌ Coach LLM Error (using fallback): {e}")
+        deadline.degrade('llm')
+        return Prompts.get('fallback', lang)
+    
+    def _reply_audio(self, text: str, lang: str, gender: str, deadline: Deadline,
+                     inline_audio: bool) -> Tuple[Optional[bytes], Optional[str]]:
+        """(audio_reply, audio_id): synthesized now, or a handle synthesized on first fetch"""
+        if inline_audio:
+            return speak(self.voice, text, lang, gender, deadline), None
+        return None, self.lazy_audio.handle(text, lang, gender)
+    
+    def get_audio(self, audio_id: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Spoken reply for an audio_id from process_text (synthesized on first fetch)
         
-        return response.choices[0].message.content
+        Returns:
+            bytes: Audio (b'' if TTS failed), or None for an unknown or expired id
+        """
+        return self.lazy_audio.get(audio_id, timeout)
     
     def _get_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of user input"""
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        
-        return {'mood': None, 'polarity': polarity}
+        polarity = nlp.polarity(text)
+        mood = 'positive' if polarity > 0.3 else 'negative' if polarity < -0.3 else 'neutral'
+        return {'mood': mood, 'polarity': round(polarity, 3)}
     
-    def _save_conversation(self, user_text: str, coach_reply: str, lang: str, input_type: str, sentiment: str = 'neutral'):
-        """Store conversation in memory"""
-        self.conversation_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'user_text': user_text,
-            'coach_reply': coach_reply,
-            'lang': lang,
-            'input_type': input_type,
-            'sentiment': sentiment
-        })
+    def _queue_sentiment(self, entry: Dict):
+        """Score an entry's sentiment later; messages queued meanwhile share one job"""
+        with self._sentiment_lock:
+            self._sentiment_queue.append((entry['id'], entry['user_text']))
+            if self._sentiment_job is None:
+                worker = self.worker or get_background_worker('sentiment')
+                self._sentiment_job = worker.submit(self._enrich_sentiment)
+    
+    def _enrich_sentiment(self):
+        """Background job: fill in 'sentiment' for queued history entries, a batch per store write"""
+        finished = False
+        try:
+            while True:
+                with self._sentiment_lock:
+                    batch = self._sentiment_queue[:self.SENTIMENT_BATCH]
+                    del self._sentiment_queue[:self.SENTIMENT_BATCH]
+                    if not batch:
+                        self._sentiment_job = None
+                        finished = True
+                        return
+                scored = []
+                for entry_id, user_text in batch:
+                    try:
+                        scored.append((entry_id, self._get_sentiment(user_text)))
+                    except Exception as e:
+                        print(f"⚠️ Sentiment Error: {e}")
+                try:
+                    self.history.set_sentiments(scored)
+                except Exception as e:
+                    print(f"⚠️ Could not store {len(scored)} sentiments: {e}")
+        finally:
+            # Never leave the session without a job slot, or it would stop scoring for good
+            if not finished:
+                with self._sentiment_lock:
+                    self._sentiment_job = None
+    
+    def flush_sentiment(self, timeout: Optional[float] = None):
+        """Wait (up to timeout) until every saved message has its sentiment; never raises"""
+        with self._sentiment_lock:
+            job = self._sentiment_job
+        if job is not None:
+            wait([job], timeout=timeout)
+    
+    def _save_conversation(self, user_text: str, coach_reply: str, lang: str, input_type: str,
+                           sentiment: Optional[Dict] = None) -> Dict:
+        """Store conversation in the history store and update session statistics"""
+        with tracing.span('persist'):
+            self.languages_used.add(lang)
+            entry = {
+                'timestamp': datetime.now().isoformat(),
+                'user_text': user_text,
+                'coach_reply': coach_reply,
+                'lang': lang,
+                'input_type': input_type,
+                'sentiment': sentiment
+            }
+            entry['id'] = self.history.append(self.user_id, entry)
+            self.recent_turns.append((user_text, coach_reply))
+            self.message_count += 1
+        return entry
     
-    def _error_response(self, message: str, lang: str, gender: str) -> Dict:
+    def _error_response(self, message: str, lang: str, gender: str, deadline: Deadline,
+                        inline_audio: bool = True) -> Dict:
         """Return error response with voice and text"""
-        audio = self.voice.text_to_speech(message, lang, gender)
+        audio, audio_id = self._reply_audio(message, lang, gender, deadline, inline_audio)
         return {
             'type': 'error',
             'text_input': '',
             'coach_reply': message,
             'audio_reply': audio,
+            'audio_id': audio_id,
             'lang': lang,
             'gender': gender,
+            'degraded': deadline.degraded,
             'timestamp': datetime.now().isoformat()
         }
     
@@ -181,29 +312,55 @@ class CoachAI:
         if gender:
             self.user_context['gender_preference'] = gender
     
+    @property
+    def conversation_history(self) -> list:
+        """The whole history, oldest first (reads every entry; prefer get_history_page)"""
+        return self.history.last(self.user_id, self.message_count)
+    
     def get_conversation_history(self, limit: int = None) -> list:
-        """Get conversation history (backend handles persistence)"""
-        if limit:
-            return self.conversation_history[-limit:]
-        return self.conversation_history
+        """Get the newest `limit` entries (all when None), oldest first"""
+        return self.history.last(self.user_id, limit or self.message_count)
+    
+    def get_history_page(self, limit: int = 50, cursor: Optional[int] = None, lang: Optional[str] = None) -> Dict:
+        """
+        One page of history, newest first
+        
+        Args:
+            limit: Entries per page
+            cursor: 'next_cursor' of the previous page (None = newest page)
+            lang: Only entries in this language
+        
+        Returns:
+            dict: {'entries', 'next_cursor'} (next_cursor is None on the last page)
+        """
+        entries, next_cursor = self.history.page(self.user_id, limit, cursor, lang)
+        return {'entries': entries, 'next_cursor': next_cursor}
     
     def clear_conversation_history(self):
         """Clear all conversation history"""
-        self.conversation_history = []
+        with self._sentiment_lock:
+            self._sentiment_queue.clear()
+        self.history.clear(self.user_id)
+        self.recent_turns.clear()
+        self.message_count = 0
+        self.languages_used = set()
     
     def get_stats(self) -> Dict:
-        """Get session statistics"""
+        """Get session statistics (O(1): counts and languages are tracked in _save_conversation)"""
         return {
-            'total_messages': len(self.conversation_history),
-            'languages_used': list(set(e.get('lang', 'en') for e in self.conversation_history)),
+            'total_messages': self.message_count,
+            'languages_used': list(self.languages_used),
             'session_start': self.user_context['session_start'],
             'current_language': self.user_context['lang'],
             'preferred_voice': self.user_context['gender_preference']
         }
+    
+    def verify_stats(self) -> bool:
+        """Check the incremental statistics against a full rescan of the history"""
+        return (self.languages_used == set(self.history.languages(self.user_id))
+                and self.message_count == self.history.count(self.user_id))
 
-from coach_ai import CoachAI
-
-coach = CoachAI()
+coach = None
 
 def test_text(text, lang='en'):
     """Test text input"""
@@ -249,6 +406,8 @@ def show_stats():
     print(f"Session Start: {stats['session_start']}")
 
 if __name__ == "__main__":
+    coach = CoachAI()
+    warmup()
     try:
         while True:
             print("\n" + "="*50)
@@ -0,0 +1,122 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_encoding = None
+
+
+def _get_encoding():
+    """Import tiktoken and load the local BPE encoding once (None if unavailable)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with the local tokenizer
+
+    Falls back to a word/punctuation estimate when tiktoken or its encoding
+    file is not available.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return len(_WORD_RE.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to roughly max_tokens tokens"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding:
+        return encoding.decode(encoding.encode(text)[:max_tokens]) + '…'
+    return text[:max(1, len(text) * max_tokens // tokens)] + '…'
+
+
+class ContextBuilder:
+    """Fills chat history newest-first within a per-handler token budget"""
+
+    # Approximate per-message framing cost of the chat format
+    MESSAGE_OVERHEAD = 4
+
+    def __init__(self, budget: int, max_item_tokens: Optional[int] = None):
+        """
+        Args:
+            budget: Total prompt tokens allowed (system + history + user turn)
+            max_item_tokens: Longer history items are truncated to this size
+        """
+        self.budget = budget
+        self.max_item_tokens = max_item_tokens or max(1, budget // 4)
+
+    def build_messages(self, system_prompts: List[str], history: List[Tuple[str, str]],
+                       user_text: str) -> Tuple[List[dict], int]:
+        """
+        Build chat messages: system prompts, as many recent exchanges as fit, then the user turn
+
+        Args:
+            system_prompts: System message contents (always included)
+            history: (user, assistant) pairs in chronological order
+            user_text: Current user message (always included)
+
+        Returns:
+            tuple: (messages, tokens used)
+        """
+        messages = [{'role': 'system', 'content': p} for p in system_prompts]
+        used = sum(count_tokens(p) + self.MESSAGE_OVERHEAD for p in system_prompts)
+        used += count_tokens(user_text) + self.MESSAGE_OVERHEAD
+
+        exchanges = []
+        for user, assistant in reversed(history):
+            user = truncate_tokens(user, self.max_item_tokens)
+            assistant = truncate_tokens(assistant, self.max_item_tokens)
+            cost = count_tokens(user) + count_tokens(assistant) + 2 * self.MESSAGE_OVERHEAD
+            if used + cost > self.budget:
+                break
+            used += cost
+            exchanges.append((user, assistant))
+
+        for user, assistant in reversed(exchanges):
+            messages.append({'role': 'user', 'content': user})
+            messages.append({'role': 'assistant', 'content': assistant})
+        messages.append({'role': 'user', 'content': user_text})
+        return messages, used
+
+    def fit_lines(self, lines: List[str], reserved: int = 0) -> Tuple[List[str], int]:
+        """
+        Keep the newest lines that fit in the budget
+
+        Args:
+            lines: Transcript lines in chronological order
+            reserved: Tokens already spent elsewhere in the prompt
+
+        Returns:
+            tuple: (kept lines in chronological order, tokens used including reserved)
+        """
+        return self.fit_prepared([self.prepare_line(line) for line in lines], reserved)
+
+    def prepare_line(self, line: str) -> Tuple[str, int]:
+        """Truncate a transcript line and count its cost once, for reuse across turns"""
+        line = truncate_tokens(line, self.max_item_tokens)
+        return line, count_tokens(line) + 1
+
+    def fit_prepared(self, items: Sequence[Tuple[str, int]], reserved: int = 0) -> Tuple[List[str], int]:
+        """fit_lines() for lines already run through prepare_line()"""
+        used = reserved
+        kept = []
+        for line, cost in reversed(items):
+            if used + cost > self.budget:
+                break
+            used += cost
+            kept.append(line)
+        kept.reverse()
+        return kept, used
@@ -0,0 +1,104 @@
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+_TOKEN_RE = re.compile(r"[\w']+")
+
+
+class CrisisMatch(NamedTuple):
+    term: str
+    start: int
+    end: int
+
+
+class CrisisResult(NamedTuple):
+    is_crisis: bool
+    matches: List[CrisisMatch]
+    negated: bool
+
+
+class CrisisDetector:
+    """
+    Crisis keyword detector compiled once and shared by every assistant
+
+    All keywords are folded into one alternation (longest first, so spans
+    cover the most specific phrase). Matching runs on text.lower(); spans
+    index into that string, which has the same offsets as the original for
+    the languages we support.
+    """
+
+    def __init__(self, keywords: Iterable[str], phrases: Iterable[str] = (),
+                 negations: Iterable[str] = (), negated_terms: Iterable[str] = (),
+                 word_boundaries: bool = True, negation_window: Optional[int] = None):
+        """
+        Args:
+            keywords: Crisis terms
+            phrases: Explicit crisis phrases, matched as plain substrings
+            negations: Words that cancel a crisis term later on the same line
+                ("I don't want to die")
+            negated_terms: Terms the negation applies to
+            word_boundaries: Match keywords as whole words (False = substrings)
+            negation_window: Max tokens between the negation and the term
+                (None = anywhere later on the same line)
+        """
+        self.keywords = self._alternation(keywords, word_boundaries)
+        self.phrases = self._alternation(phrases, False)
+        self.negation_window = negation_window
+        self.negation = self.negation_words = self.negated_terms = None
+        if negations and negated_terms:
+            negs = '|'.join(re.escape(n.lower()) for n in negations)
+            terms = '|'.join(re.escape(t.lower()) for t in negated_terms)
+            self.negation = re.compile(rf"\b(?:{negs})\b.*\b(?:{terms})\b")
+            self.negation_words = re.compile(rf"\b(?:{negs})\b")
+            self.negated_terms = re.compile(rf"\b(?:{terms})\b")
+
+    def detect(self, text: str) -> CrisisResult:
+        """Verdict plus the matched spans"""
+        if not text or not isinstance(text, str):
+            return CrisisResult(False, [], False)
+        t = text.lower()
+        if self._negated(t):
+            return CrisisResult(False, [], True)
+        # A phrase and a keyword can cover the same text ("i want to die")
+        matches = sorted(set(self._find(self.phrases, t) + self._find(self.keywords, t)),
+                         key=lambda m: (m.start, -m.end))
+        return CrisisResult(bool(matches), matches, False)
+
+    def is_crisis(self, text: str) -> bool:
+        """Verdict only (stops at the first match)"""
+        if not text or not isinstance(text, str):
+            return False
+        t = text.lower()
+        if self._negated(t):
+            return False
+        return bool((self.phrases and self.phrases.search(t)) or (self.keywords and self.keywords.search(t)))
+
+    def find(self, text: str) -> List[CrisisMatch]:
+        """Spans of every crisis term (empty if negated or none found)"""
+        return self.detect(text).matches
+
+    def _negated(self, t: str) -> bool:
+        if self.negation is None:
+            return False
+        if self.negation_window is None:
+            return self.negation.search(t) is not None
+        # Closest negated term after each negation, same line, within the window
+        for neg in self.negation_words.finditer(t):
+            line_end = t.find('\n', neg.end())
+            term = self.negated_terms.search(t, neg.end(), len(t) if line_end < 0 else line_end)
+            if term and len(_TOKEN_RE.findall(t, neg.end(), term.start())) <= self.negation_window:
+                return True
+        return False
+
+    @staticmethod
+    def _alternation(terms: Iterable[str], word_boundaries: bool) -> Optional[re.Pattern]:
+        terms = sorted({t.lower() for t in terms}, key=len, reverse=True)
+        if not terms:
+            return None
+        pattern = '|'.join(re.escape(t) for t in terms)
+        return re.compile(rf"\b(?:{pattern})\b" if word_boundaries else pattern)
+
+    @staticmethod
+    def _find(pattern: Optional[re.Pattern], t: str) -> List[CrisisMatch]:
+        if pattern is None:
+            return []
+        return [CrisisMatch(m.group(), m.start(), m.end()) for m in pattern.finditer(t)]
@@ -0,0 +1,91 @@
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import tracing
+
+# End-to-end budgets (seconds) for one request, from the moment it reaches the assistant
+VOICE_BUDGET = float(os.getenv('VOICEMIND_VOICE_BUDGET', 12.0))
+TEXT_BUDGET = float(os.getenv('VOICEMIND_TEXT_BUDGET', 8.0))
+
+# Relative weight of each pipeline stage in the budget
+STAGE_SHARES = {'stt': 0.25, 'llm': 0.5, 'tts': 0.25}
+VOICE_STAGES = ('stt', 'llm', 'tts')
+TEXT_STAGES = ('llm', 'tts')
+
+# A stage with less time than this left is skipped and its fallback used
+MIN_STAGE_TIMEOUT = 0.25
+
+# Timeout for upstream calls made outside any request deadline
+DEFAULT_TIMEOUT = 30.0
+
+
+class Deadline:
+    """
+    Monotonic time budget for one request, split across pipeline stages
+
+    A stage gets its share of the time still remaining, weighed against the
+    stages after it, so time left over by a fast stage rolls forward.
+    """
+
+    def __init__(self, seconds: float, stages: Sequence[str] = VOICE_STAGES,
+                 shares: Optional[Dict[str, float]] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.stages = list(stages)
+        self.shares = shares or STAGE_SHARES
+        self.degraded = []
+
+    @classmethod
+    def for_voice(cls) -> 'Deadline':
+        """Budget for STT → LLM → TTS"""
+        return cls(VOICE_BUDGET, VOICE_STAGES)
+
+    @classmethod
+    def for_text(cls) -> 'Deadline':
+        """Budget for LLM → TTS"""
+        return cls(TEXT_BUDGET, TEXT_STAGES)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, stage: str) -> float:
+        """
+        Seconds a stage may spend on its upstream call
+
+        Returns:
+            float: Stage timeout, or 0.0 if too little time is left to try it
+        """
+        remaining = self.remaining()
+        if stage in self.stages:
+            later = self.stages[self.stages.index(stage):]
+            budget = remaining * self.shares[stage] / sum(self.shares[s] for s in later)
+        else:
+            budget = remaining
+        return budget if budget >= MIN_STAGE_TIMEOUT else 0.0
+
+    def degrade(self, stage: str):
+        """Record that a stage fell back instead of producing a real result"""
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+
+def speak(voice, text: str, lang: str, gender: str, deadline: Deadline) -> bytes:
+    """
+    Text-to-speech within the deadline's TTS stage budget
+
+    Returns:
+        bytes: Audio, or b'' (with 'tts' marked degraded) when too little time
+        was left or synthesis failed, so the reply goes out as text only
+    """
+    timeout = deadline.timeout('tts')
+    with tracing.span('tts'):
+        audio = voice.text_to_speech(text, lang, gender, timeout=timeout) if timeout else b''
+    if not audio:
+        deadline.degrade('tts')
+    return audio
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from text_index import VectorIndex, normalize_text
+
+
+def guides_fingerprint(guides: dict) -> str:
+    """Stable hash of the guide content; changes whenever GUIDES is edited"""
+    return hashlib.sha1(json.dumps(guides, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class GuideCache:
+    """
+    Cached guide answers keyed by normalized question + language
+
+    Paraphrases are matched through a local similarity index, but only
+    against entries built from the same JunoGuide app info, so a reused
+    answer always describes the same page.
+    """
+
+    SIMILARITY_THRESHOLD = 0.75
+
+    def __init__(self, guides: dict, max_entries: int = 2000, threshold: Optional[float] = None,
+                 max_audio_mb: float = 64):
+        self.max_entries = max_entries
+        self.max_audio_bytes = int(max_audio_mb * 1024 * 1024)
+        self.threshold = threshold or self.SIMILARITY_THRESHOLD
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._reset(guides_fingerprint(guides))
+
+    def get(self, question: str, lang: str, app_info: str) -> Optional[dict]:
+        """
+        Look up a cached answer
+
+        Returns:
+            dict: {'reply': str, 'audio': bytes or None} or None on a miss
+        """
+        key = (normalize_text(question), lang)
+        info_hash = self._hash(app_info)
+        with self._lock:
+            doc_id = self._exact.get(key)
+            if doc_id is None:
+                doc_id = self._similar(key, info_hash)
+            entry = self._entries.get(doc_id) if doc_id is not None else None
+            if entry is None or entry['info_hash'] != info_hash:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(doc_id)
+            self.hits += 1
+            return {'reply': entry['reply'], 'audio': entry['audio']}
+
+    def put(self, question: str, lang: str, app_info: str, reply: str, audio: Optional[bytes] = None):
+        """Store an answer (and optionally its synthesized audio)"""
+        key = (normalize_text(question), lang)
+        with self._lock:
+            if key in self._exact:
+                self._drop(self._exact[key])
+            index = self._indexes.setdefault(lang, VectorIndex())
+            doc_id = (lang, index.add(key[0]))
+            self._exact[key] = doc_id
+            self._entries[doc_id] = {
+                'key': key,
+                'info_hash': self._hash(app_info),
+                'reply': reply,
+                'audio': None
+            }
+            self._store_audio(doc_id, audio)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def set_audio(self, question: str, lang: str, audio: bytes):
+        """Attach synthesized audio to an existing entry"""
+        with self._lock:
+            doc_id = self._exact.get((normalize_text(question), lang))
+            if doc_id in self._entries:
+                self._store_audio(doc_id, audio)
+
+    def get_template_audio(self, text: str, lang: str) -> Optional[bytes]:
+        """Pre-rendered audio for a templated (LLM-free) guide answer"""
+        return self._template_audio.get((text, lang))
+
+    def put_template_audio(self, text: str, lang: str, audio: bytes):
+        """Store pre-rendered audio for a templated guide answer"""
+        if audio:
+            with self._lock:
+                self._template_audio[(text, lang)] = audio
+
+    def validate(self, guides: dict) -> bool:
+        """
+        Drop every entry if the guide content changed since it was cached
+
+        Returns:
+            bool: True if the cache was still valid
+        """
+        fingerprint = guides_fingerprint(guides)
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return True
+            self._reset(fingerprint)
+            return False
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        return {
+            'entries': len(self._entries),
+            'audio_bytes': self._audio_bytes,
+            'template_audio': len(self._template_audio),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+    def _similar(self, key: tuple, info_hash: str):
+        """Best paraphrase match above the threshold with the same app info"""
+        question, lang = key
+        index = self._indexes.get(lang)
+        if index is None:
+            return None
+        for local_id, score in index.search(question, k=5, min_score=self.threshold):
+            entry = self._entries.get((lang, local_id))
+            if entry and entry['info_hash'] == info_hash:
+                return (lang, local_id)
+        return None
+
+    def _store_audio(self, doc_id, audio: Optional[bytes]):
+        """Attach audio to an entry while the total stays under the audio budget"""
+        entry = self._entries[doc_id]
+        if entry['audio']:
+            self._audio_bytes -= len(entry['audio'])
+            entry['audio'] = None
+        if audio and self._audio_bytes + len(audio) <= self.max_audio_bytes:
+            entry['audio'] = audio
+            self._audio_bytes += len(audio)
+
+    def _drop(self, doc_id):
+        entry = self._entries.pop(doc_id, None)
+        if entry is None:
+            return
+        self._exact.pop(entry['key'], None)
+        if entry['audio']:
+            self._audio_bytes -= len(entry['audio'])
+        lang = doc_id[0]
+        self._indexes[lang].remove(doc_id[1])
+        if self._indexes[lang].needs_rebuild:
+            self._rebuild_index(lang)
+
+    def _rebuild_index(self, lang: str):
+        """Re-index the live entries of a language to purge removed documents"""
+        index = VectorIndex()
+        entries = OrderedDict()
+        for doc_id, entry in self._entries.items():
+            if doc_id[0] == lang:
+                doc_id = (lang, index.add(entry['key'][0]))
+                self._exact[entry['key']] = doc_id
+            entries[doc_id] = entry
+        self._entries = entries
+        self._indexes[lang] = index
+
+    def _reset(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self._entries = OrderedDict()
+        self._exact = {}
+        self._indexes = {}
+        self._audio_bytes = 0
+        self._template_audio = {}
+
+    @staticmethod
+    def _hash(app_info: str) -> str:
+        return hashlib.sha1(app_info.encode('utf-8')).hexdigest()
@@ -0,0 +1,234 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fields of a stored conversation entry, besides its 'id'
+FIELDS = ('timestamp', 'user_text', 'coach_reply', 'lang', 'input_type', 'sentiment')
+
+
+class HistoryStore:
+    """
+    Per-user conversation history
+
+    Entries get increasing ids; a page cursor is the id of the last entry
+    returned, so paging stays cheap however long the history grows.
+    """
+
+    def append(self, user_id: str, entry: Dict) -> int:
+        """Store an entry (FIELDS) and return its id"""
+        raise NotImplementedError
+
+    def set_sentiments(self, items: Iterable[Tuple[int, Dict]]):
+        """Write the sentiment of several entries at once: [(entry_id, sentiment)]"""
+        raise NotImplementedError
+
+    def last(self, user_id: str, n: int) -> List[Dict]:
+        """Newest n entries, oldest first"""
+        raise NotImplementedError
+
+    def page(self, user_id: str, limit: int = 50, cursor: Optional[int] = None, lang: Optional[str] = None,
+             since: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of history, newest first
+
+        Args:
+            limit: Entries per page
+            cursor: next_cursor of the previous page (None = start from the newest)
+            lang: Only entries in this language
+            since: Only entries with an ISO timestamp >= since
+
+        Returns:
+            tuple: (entries, next_cursor), next_cursor is None on the last page
+        """
+        raise NotImplementedError
+
+    def count(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def languages(self, user_id: str) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self, user_id: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryHistoryStore(HistoryStore):
+    """History kept in process memory (tests, CLI, single worker)"""
+
+    def __init__(self):
+        self._users: Dict[str, List[Dict]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        self._by_id: Dict[int, Dict] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def append(self, user_id: str, entry: Dict) -> int:
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            stored = {'id': entry_id, **{k: entry.get(k) for k in FIELDS}}
+            self._users.setdefault(user_id, []).append(stored)
+            self._ids.setdefault(user_id, []).append(entry_id)
+            self._by_id[entry_id] = stored
+            return entry_id
+
+    def set_sentiments(self, items: Iterable[Tuple[int, Dict]]):
+        with self._lock:
+            for entry_id, sentiment in items:
+                if entry_id in self._by_id:
+                    self._by_id[entry_id]['sentiment'] = sentiment
+
+    def last(self, user_id: str, n: int) -> List[Dict]:
+        with self._lock:
+            return [dict(e) for e in self._users.get(user_id, [])[-n:]] if n > 0 else []
+
+    def page(self, user_id: str, limit: int = 50, cursor: Optional[int] = None, lang: Optional[str] = None,
+             since: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        with self._lock:
+            entries = self._users.get(user_id, [])
+            end = len(entries) if cursor is None else bisect.bisect_left(self._ids.get(user_id, []), cursor)
+            found = []
+            for i in range(end - 1, -1, -1):
+                entry = entries[i]
+                if since is not None and entry['timestamp'] < since:
+                    break
+                if lang is None or entry['lang'] == lang:
+                    found.append(dict(entry))
+                    if len(found) > limit:
+                        break
+        return _page(found, limit)
+
+    def count(self, user_id: str) -> int:
+        return len(self._users.get(user_id, []))
+
+    def languages(self, user_id: str) -> List[str]:
+        with self._lock:
+            return sorted({e['lang'] for e in self._users.get(user_id, [])})
+
+    def clear(self, user_id: str):
+        with self._lock:
+            for entry in self._users.pop(user_id, []):
+                del self._by_id[entry['id']]
+            self._ids.pop(user_id, None)
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """
+    History in a SQLite file shared by every session of a worker
+
+    Indexed by (user, id), (user, timestamp) and (user, lang, id), so last-N
+    reads and pages touch only the rows they return and sessions hold no
+    history in RAM.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            lang TEXT NOT NULL,
+            input_type TEXT,
+            user_text TEXT NOT NULL,
+            coach_reply TEXT NOT NULL,
+            sentiment TEXT
+        );
+        CREATE INDEX IF NOT EXISTS history_user ON history (user_id, id);
+        CREATE INDEX IF NOT EXISTS history_user_time ON history (user_id, timestamp);
+        CREATE INDEX IF NOT EXISTS history_user_lang ON history (user_id, lang, id);
+    """
+    COLUMNS = 'id, timestamp, user_text, coach_reply, lang, input_type, sentiment'
+
+    def __init__(self, filepath: str = 'coach_history.db'):
+        """
+        Args:
+            filepath: SQLite database file (created if missing)
+        """
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filepath, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(self.SCHEMA)
+
+    def append(self, user_id: str, entry: Dict) -> int:
+        sentiment = entry.get('sentiment')
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'INSERT INTO history (user_id, timestamp, lang, input_type, user_text, coach_reply, sentiment) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (user_id, entry['timestamp'], entry['lang'], entry.get('input_type'), entry['user_text'],
+                 entry['coach_reply'], None if sentiment is None else json.dumps(sentiment)))
+            return cursor.lastrowid
+
+    def set_sentiments(self, items: Iterable[Tuple[int, Dict]]):
+        rows = [(json.dumps(sentiment), entry_id) for entry_id, sentiment in items]
+        if rows:
+            with self._lock, self._db:
+                self._db.executemany('UPDATE history SET sentiment = ? WHERE id = ?', rows)
+
+    def last(self, user_id: str, n: int) -> List[Dict]:
+        if n <= 0:
+            return []
+        rows = self._query(f'SELECT {self.COLUMNS} FROM history WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                           (user_id, n))
+        return [self._entry(row) for row in reversed(rows)]
+
+    def page(self, user_id: str, limit: int = 50, cursor: Optional[int] = None, lang: Optional[str] = None,
+             since: Optional[str] = None) -> Tuple[List[Dict], Optional[int]]:
+        where, params = ['user_id = ?'], [user_id]
+        if cursor is not None:
+            where.append('id < ?')
+            params.append(cursor)
+        if lang is not None:
+            where.append('lang = ?')
+            params.append(lang)
+        if since is not None:
+            where.append('timestamp >= ?')
+            params.append(since)
+        # One extra row tells whether another page follows
+        rows = self._query(f"SELECT {self.COLUMNS} FROM history WHERE {' AND '.join(where)} "
+                           f"ORDER BY id DESC LIMIT ?", (*params, limit + 1))
+        return _page([self._entry(row) for row in rows], limit)
+
+    def count(self, user_id: str) -> int:
+        return self._query('SELECT COUNT(*) FROM history WHERE user_id = ?', (user_id,))[0][0]
+
+    def languages(self, user_id: str) -> List[str]:
+        return [row[0] for row in self._query('SELECT DISTINCT lang FROM history WHERE user_id = ? ORDER BY lang',
+                                              (user_id,))]
+
+    def clear(self, user_id: str):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM history WHERE user_id = ?', (user_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _entry(row: tuple) -> Dict:
+        entry = dict(zip(('id',) + FIELDS, row))
+        if entry['sentiment'] is not None:
+            entry['sentiment'] = json.loads(entry['sentiment'])
+        return entry
+
+
+def _page(found: List[Dict], limit: int) -> Tuple[List[Dict], Optional[int]]:
+    """Trim a limit+1 lookahead to one page and its cursor"""
+    if len(found) > limit:
+        found = found[:limit]
+        return found, found[-1]['id'] if found else None
+    return found, None
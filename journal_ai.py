@@ -1,12 +1,16 @@
-from openai import OpenAI
-from textblob import TextBlob
 from datetime import datetime
-import os
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Optional
+import nlp
+import tracing
 from voice import VoiceEngine
 from prompt import Prompts
+from clients import get_openai_client, get_voice_engine, warmup
+from deadline import TEXT_BUDGET, Deadline, speak
+from crisis_detector import CrisisDetector
+from checkpoint import SessionCheckpoint
 
-load_dotenv()
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 class JournalAI:
@@ -35,6 +39,7 @@ class JournalAI:
         'cutting', 'die', 'worthless', 'want to die', 'better off dead',
         'no point living', 'hate myself', 'end my life'
     ]
+    CRISIS_DETECTOR = CrisisDetector(CRISIS_KEYWORDS, word_boundaries=False)
 
     CRISIS_RESPONSE = {
         'en': "I hear you, and I'm truly concerned about you. What you're feeling is real, and you matter deeply to God and to me. You're not alone in this pain. Please reach out immediately to someone you trust - a pastor, counselor, or trusted adult - or contact a crisis helpline. God's heart breaks with yours. Would you like to try a calming breathing exercise together?",
@@ -62,61 +67,82 @@ class JournalAI:
         ]
     }
 
-    def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("❌ OPENAI_API_KEY not found in .env file!")
-        
-        self.client = OpenAI(api_key=api_key)
-        self.voice = VoiceEngine()
+    def __init__(self, client: Optional['OpenAI'] = None, voice: Optional[VoiceEngine] = None):
+        """
+        Args:
+            client, voice: Default to the process-wide instances from clients.py
+        """
+        self.client = client or get_openai_client()
+        self.voice = voice or get_voice_engine()
         self.memory = []
         self.phase = 'feel'
         self.entry_start = datetime.now()
+        self.checkpoint = None
         print("✅ JournalAI initialized - FEEL → UNDERSTAND → RELIEVE")
 
-    def process_voice(self, audio_data: bytes, language: str = 'en', gender: str = 'female') -> dict:
-        """Process voice input with STT → AI → TTS"""
+    def process_voice(self, audio_data: bytes, language: str = 'en', gender: str = 'female',
+                      deadline: Optional[Deadline] = None) -> dict:
+        """Process voice input with STT → AI → TTS within a request deadline"""
         if language not in self.PHASES:
             language = 'en'
+        deadline = deadline or Deadline.for_voice()
 
-        stt_result = self.voice.speech_to_text(audio_data)
-        patient_text = stt_result['text']
-        
-        if not patient_text:
-            error_msg = "I couldn't hear you clearly. Could you please repeat?"
-            audio = self.voice.text_to_speech(error_msg, language, gender)
-            return {'text': error_msg, 'audio': audio, 'language': language, 'phase': self.phase}
-
-        response_text = self._generate_response(patient_text, language)
-        response_audio = self.voice.text_to_speech(response_text, language, gender)
-
-        return {
-            'patient_input': patient_text,
-            'response': response_text,
-            'audio': response_audio,
-            'language': language,
-            'phase': self.phase
-        }
-
-    def process_text(self, patient_text: str, language: str = 'en') -> dict:
-        """Process text input"""
+        with tracing.trace('journal.voice') as trace:
+            timeout = deadline.timeout('stt')
+            with tracing.span('stt'):
+                stt_result = self.voice.speech_to_text(audio_data, timeout=timeout) if timeout else {'text': ''}
+            patient_text = stt_result['text']
+            
+            if not patient_text:
+                deadline.degrade('stt')
+                error_msg = "I couldn't hear you clearly. Could you please repeat?"
+                audio = speak(self.voice, error_msg, language, gender, deadline)
+                result = {'text': error_msg, 'audio': audio, 'language': language, 'phase': self.phase,
+                          'degraded': deadline.degraded}
+            else:
+                response_text = self._generate_response(patient_text, language, deadline)
+                self._checkpoint()
+                response_audio = speak(self.voice, response_text, language, gender, deadline)
+                result = {
+                    'patient_input': patient_text,
+                    'response': response_text,
+                    'audio': response_audio,
+                    'language': language,
+                    'phase': self.phase,
+                    'degraded': deadline.degraded
+                }
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
+
+    def process_text(self, patient_text: str, language: str = 'en', deadline: Optional[Deadline] = None) -> dict:
+        """Process text input (the whole budget goes to the LLM, there is no TTS)"""
         if language not in self.PHASES:
             language = 'en'
+        deadline = deadline or Deadline(TEXT_BUDGET, stages=('llm',))
 
-        response_text = self._generate_response(patient_text, language)
+        with tracing.trace('journal.text') as trace:
+            response_text = self._generate_response(patient_text, language, deadline)
+            self._checkpoint()
 
-        return {
+        result = {
             'patient_input': patient_text,
             'response': response_text,
             'language': language,
-            'phase': self.phase
+            'phase': self.phase,
+            'degraded': deadline.degraded
         }
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
 
-    def _generate_response(self, patient_text: str, language: str) -> str:
+    def _generate_response(self, patient_text: str, language: str, deadline: Deadline) -> str:
         """Generate response based on current phase"""
         
         # Check for crisis
-        if self._is_crisis(patient_text):
+        with tracing.span('classify'):
+            is_crisis = self._is_crisis(patient_text)
+        if is_crisis:
             return self._handle_crisis(patient_text, language)
         
         sentiment = self._analyze_sentiment(patient_text)
@@ -139,14 +165,25 @@ class JournalAI:
             {'role': 'user', 'content': f"Conversation:\n{conversation_context}"}
         ]
 
-        response = self.client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=messages,
-            max_tokens=200,
-            temperature=0.7
-        )
-
-        therapist_reply = response.choices[0].message.content
+        therapist_reply = None
+        timeout = deadline.timeout('llm')
+        if timeout:
+            try:
+                with tracing.span('llm') as span:
+                    response = self.client.chat.completions.create(
+                        model='gpt-4o-mini',
+                        messages=messages,
+                        max_tokens=200,
+                        temperature=0.7,
+                        timeout=timeout
+                    )
+                    tracing.record_usage(span, response)
+                therapist_reply = response.choices[0].message.content
+            except Exception as e:
+                print(f"❌ Journal LLM Error (using fallback): {e}")
+        if not therapist_reply:
+            deadline.degrade('llm')
+            therapist_reply = Prompts.get('fallback', language)
 
         # Add Bible verse in relieve phase
         if self.phase == 'relieve':
@@ -173,8 +210,8 @@ class JournalAI:
 
     def _analyze_sentiment(self, text: str) -> str:
         """Analyze sentiment"""
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
+        with tracing.span('sentiment'):
+            polarity = nlp.polarity(text)
 
         if polarity > 0.3:
             return 'positive'
@@ -188,8 +225,36 @@ class JournalAI:
         """Get full conversation memory"""
         return self.memory
 
+    def open_checkpoint(self, filepath: str):
+        """Resume the entry checkpointed at filepath (if any) and checkpoint there after every turn"""
+        self.close_checkpoint()
+        self.checkpoint = SessionCheckpoint(filepath)
+        turns, state = self.checkpoint.restore()
+        if state is not None:
+            # Turns carry their stored sentiment, so nothing is recomputed
+            self.memory = turns
+            self.phase = state['phase']
+            self.entry_start = datetime.fromisoformat(state['entry_start'])
+            print(f"✅ Resumed journal entry ({len(self.memory)} messages, phase {self.phase})")
+
+    def close_checkpoint(self):
+        """Stop checkpointing (the snapshot stays on disk for the next worker)"""
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+            self.checkpoint = None
+
+    def _checkpoint(self):
+        """Append new turns and the entry state to the checkpoint"""
+        if self.checkpoint is None:
+            return
+        with tracing.span('checkpoint'):
+            self.checkpoint.save(self.memory[self.checkpoint.written:],
+                                 {'phase': self.phase, 'entry_start': self.entry_start.isoformat()})
+
     def clear_memory(self):
         """Clear memory for new journal entry"""
+        if self.checkpoint is not None:
+            self.checkpoint.discard()
         self.memory = []
         self.phase = 'feel'
         self.entry_start = datetime.now()
@@ -206,7 +271,7 @@ class JournalAI:
 
     def _is_crisis(self, text: str) -> bool:
         """Check for crisis keywords"""
-        return any(k in text.lower() for k in self.CRISIS_KEYWORDS)
+        return self.CRISIS_DETECTOR.is_crisis(text)
 
     def _handle_crisis(self, patient_text: str, language: str) -> str:
         """Handle crisis situation"""
@@ -241,6 +306,7 @@ def main():
     except ValueError as e:
         print(f"❌ Error: {e}")
         return
+    warmup()
     
     language = 'en'
     
@@ -1,12 +1,52 @@
-from openai import OpenAI
-from textblob import TextBlob
 from datetime import datetime
-import os
-from dotenv import load_dotenv
 import re
 import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import TimeoutError as FutureTimeout, wait
+import nlp
+import tracing
+from background import get_background_worker
+from checkpoint import SessionCheckpoint
+from context_builder import ContextBuilder, count_tokens
+from clients import get_config, get_openai_client, warmup
+from deadline import TEXT_BUDGET, Deadline
+from crisis_detector import CrisisDetector
+from theme_store import ThemeMatcher
+from transcript import ChunkSummaries, SessionAnalysis, Transcript
+
+class ReplyStats:
+    """Process-wide speculative reply outcomes and LLM latency per phase (for tuning REPLY_BUDGETS)"""
+
+    OUTCOMES = ('on_time', 'fallbacks', 'late', 'failed', 'saturated')
+    LATENCY_SAMPLES = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._latency = {}
+
+    def record(self, phase, outcome, latency_ms=None):
+        with self._lock:
+            counts = self._counts.setdefault(phase, dict.fromkeys(self.OUTCOMES, 0))
+            counts[outcome] += 1
+            if latency_ms is not None:
+                self._latency.setdefault(phase, deque(maxlen=self.LATENCY_SAMPLES)).append(latency_ms)
+
+    def stats(self) -> dict:
+        """Counts plus p50/p95 latency (ms from call start, late answers included) per phase"""
+        with self._lock:
+            result = {}
+            for phase, counts in self._counts.items():
+                samples = sorted(self._latency.get(phase, ()))
+                result[phase] = dict(counts)
+                result[phase]['budget_s'] = JournalAI.REPLY_BUDGETS.get(phase)
+                if samples:
+                    result[phase]['p50_ms'] = round(samples[len(samples) // 2])
+                    result[phase]['p95_ms'] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))])
+            return result
 
-load_dotenv()
 
 class JournalAI:
     """FEEL → UNDERSTAND → RELIEVE Journaling AI (Updated: warmer, faster, smarter crisis detection)"""
@@ -73,6 +113,20 @@ class JournalAI:
 
     NEGATION_WORDS = ['don\'t', 'dont', 'didn\'t', 'didnt', 'not', 'no', 'won\'t', 'wont', 'never', 'wouldn\'t', 'wouldnt']
 
+    # Terms a preceding negation cancels ("I didn't want to die")
+    NEGATED_TERMS = ['die', 'kill', 'suicide', 'suicid', 'end my life', 'harm']
+
+    EXPLICIT_PHRASES = [
+        "i want to die", "i want to kill myself", "i want to suicide",
+        "i'm going to kill myself", "i'm going to end my life",
+        "i'm going to die", "i plan to kill", "will kill myself"
+    ]
+
+    CRISIS_DETECTOR = CrisisDetector(CRISIS_KEYWORDS, phrases=EXPLICIT_PHRASES,
+                                     negations=NEGATION_WORDS, negated_terms=NEGATED_TERMS)
+
+    THEME_MATCHER = ThemeMatcher()
+
     CRISIS_TEMPLATE = ("I'm really glad you told me this. I can hear how much pain you're in. "
                        "Please reach out to {helpline} right now. You deserve support, and help is real. "
                        "You matter, and you're not alone.")
@@ -111,14 +165,67 @@ class JournalAI:
         ]
     }
 
-    def __init__(self, api_key=None, language='en'):
-        api_key = api_key or os.getenv('OPENAI_API_KEY')
-        if not api_key:
+    CONTEXT_BUDGET = 700
+    MAX_CONTEXT_MESSAGES = 20
+    SUMMARY_TIMEOUT = 10.0
+    # Long sessions are summarised in chunks as they go; the final summary
+    # merges at most MAX_CHUNK_SUMMARIES of them plus the unsummarised tail
+    SUMMARY_CHUNK = 12
+    CHUNK_SUMMARY_MAX_CHARS = 400
+    MAX_CHUNK_SUMMARIES = 6
+    # Chunk summaries get their own pool so slow LLM calls never hold up panel analysis
+    SUMMARY_WORKERS = 4
+    # How long close_checkpoint waits for background analysis still in flight
+    ANALYSIS_FLUSH_TIMEOUT = 5.0
+    # Total budget of end_session, split across waiting for analyses, waiting
+    # for the chunk summary job and the final summary call
+    END_SESSION_BUDGET = 12.0
+    END_SESSION_SHARES = {'analysis': 0.25, 'chunks': 0.25, 'llm': 0.5}
+
+    # Speculative mode: seconds to wait for the LLM per phase before answering
+    # with a DEFAULT_RESPONSES line (the call keeps running and is logged if late)
+    REPLY_BUDGETS = {'feel': 2.5, 'understand': 3.0, 'relieve': 3.5}
+    SPECULATIVE_WORKERS = 16
+    LATE_REPLY_HISTORY = 50
+
+    def __init__(self, api_key=None, language='en', client=None, crisis_helpline=None,
+                 background_analysis=False, on_analysis=None, worker=None, speculative=False,
+                 trend_store=None, user_id=None):
+        """
+        Args:
+            background_analysis: Return replies without waiting for the panel analysis;
+                it is computed on a background worker and fetched with get_analysis()
+            on_analysis: Called as on_analysis(turn_id, analysis) when a background
+                analysis is ready (from the worker thread)
+            worker: BackgroundWorker to use (default: the shared one)
+            speculative: Cap reply latency at REPLY_BUDGETS, falling back to a
+                phase-appropriate default reply when the LLM is slower
+            trend_store: TrendStore that gets one point per ended session
+            user_id: Whose trend series the sessions belong to
+        """
+        if client is not None:
+            self.client = client
+        elif api_key:
+            from openai import OpenAI
+            self.client = OpenAI(api_key=api_key)
+        elif get_config().openai_api_key:
+            self.client = get_openai_client()
+        else:
             print("Warning: OPENAI_API_KEY not found. Using fallback responses.")
             self.client = None
-        else:
-            self.client = OpenAI(api_key=api_key)
         self.language = language if language in self.PROMPTS['feel'] else 'en'
+        self.crisis_helpline = crisis_helpline
+        self.background_analysis = background_analysis
+        self.on_analysis = on_analysis
+        self.worker = worker
+        self.speculative = speculative
+        self.trend_store = trend_store
+        self.user_id = user_id
+        self._analysis_lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self.checkpoint = None
+        self.context_builder = ContextBuilder(self.CONTEXT_BUDGET)
+        self.last_context_tokens = 0
         self.clear_memory()
         self.analysis = []
 
@@ -128,29 +235,64 @@ class JournalAI:
         self.language = language
         return {'response': self.MESSAGES['welcome'][language], 'language': language, 'phase': self.phase}
 
-    def process_text(self, text, language=None):
+    def process_text(self, text, language=None, deadline=None):
         if language and language in self.PROMPTS['feel']:
             self.language = language
-
-        # Check for crisis—with negation awareness
-        is_crisis = self._is_crisis(text)
-        if is_crisis:
-            response = self._crisis_response(text)
-            return {'response': response, 'language': self.language, 'phase': self.phase, 'is_crisis': True, 'analysis': None}
-
-        # Generate response
-        response = self._generate_response(text)
-        
-        # Generate analysis (silent, for panel only)
-        analysis = self._generate_analysis(text)
-
-        return {
-            'response': response,
-            'language': self.language,
-            'phase': self.phase,
-            'is_crisis': False,
-            'analysis': analysis
-        }
+        # Text only, so the whole request budget goes to the LLM call
+        deadline = deadline or Deadline(TEXT_BUDGET, stages=('llm',))
+
+        with tracing.trace('journal.text') as trace:
+            # The user's message is the next transcript entry
+            turn_id = len(self.memory)
+
+            # Check for crisis—with negation awareness
+            with tracing.span('classify'):
+                is_crisis = self._is_crisis(text)
+            if is_crisis:
+                response = self._crisis_response(text)
+                result = {'response': response, 'language': self.language, 'phase': self.phase, 'is_crisis': True,
+                          'analysis': None, 'analysis_pending': False, 'turn_id': turn_id,
+                          'degraded': deadline.degraded}
+            else:
+                if self.background_analysis:
+                    # Reserved before the turn is appended, so a checkpoint taken by another
+                    # turn's analysis never writes this one without its analysis
+                    with self._analysis_lock:
+                        self._pending[turn_id] = None
+                # Generate response
+                try:
+                    response = self._generate_response(text, deadline)
+                except Exception:
+                    with self._analysis_lock:
+                        self._pending.pop(turn_id, None)
+                    raise
+
+                # Generate analysis (silent, for panel only) and keep it with the turn
+                turn = self.memory.turns[turn_id]
+                if self.background_analysis:
+                    analysis = None
+                    self._submit_analysis(turn_id, turn)
+                else:
+                    with tracing.span('analysis'):
+                        analysis = self._generate_analysis(text)
+                    self._store_analysis(turn, analysis, self.session_analysis)
+
+                result = {
+                    'response': response,
+                    'language': self.language,
+                    'phase': self.phase,
+                    'is_crisis': False,
+                    'analysis': analysis,
+                    'analysis_pending': analysis is None,
+                    'turn_id': turn_id,
+                    'context_tokens': self.last_context_tokens,
+                    'degraded': deadline.degraded
+                }
+            with tracing.span('checkpoint'):
+                self._checkpoint()
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
 
     def _is_crisis(self, text):
         """
@@ -158,81 +300,142 @@ class JournalAI:
         "didn't want to die" or "don't want to kill myself" = NOT crisis
         "want to die" or "going to kill myself" = CRISIS
         """
-        if not text or not isinstance(text, str):
-            return False
-
-        t = text.lower().strip()
-
-        # Check for negation first
-        for neg in self.NEGATION_WORDS:
-            if re.search(r'\b' + re.escape(neg) + r'\b.*\b(die|kill|suicide|suicid|end my life|harm)\b', t):
-                return False  # Negated statement = NOT crisis
-
-        # Explicit crisis phrases (without negation)
-        explicit_phrases = [
-            "i want to die", "i want to kill myself", "i want to suicide",
-            "i'm going to kill myself", "i'm going to end my life",
-            "i'm going to die", "i plan to kill", "will kill myself"
-        ]
-        for phrase in explicit_phrases:
-            if phrase in t:
-                return True
-
-        # Keyword matching
-        for kw in self.CRISIS_KEYWORDS:
-            pattern = r'\b' + re.escape(kw.lower()) + r'\b'
-            if re.search(pattern, t):
-                return True
+        return self.CRISIS_DETECTOR.is_crisis(text)
 
-        return False
-
-    def _generate_response(self, text):
+    def _generate_response(self, text, deadline):
         """Generate warm, short response like a close friend."""
         try:
-            polarity = TextBlob(text).sentiment.polarity
+            with tracing.span('sentiment'):
+                polarity = nlp.polarity(text)
         except Exception:
             polarity = 0.0
 
         sentiment_label = 'positive' if polarity > 0.3 else 'negative' if polarity < -0.3 else 'neutral'
-        self.memory.append({'role': 'user', 'text': text, 'sentiment': sentiment_label, 'phase': self.phase})
+        self.memory.append('user', text, self.phase, sentiment_label)
 
-        # Build context from last few messages
-        context = "\n".join([f"{m['role'].title()}: {m['text']}" for m in self.memory[-6:]])
+        # Build context from as many recent messages as fit the token budget
+        # (lines are truncated and counted once, when they enter the transcript)
         system = self.PROMPTS.get(self.phase, {}).get(self.language, self.PROMPTS['feel']['en'])
+        lines, self.last_context_tokens = self.context_builder.fit_prepared(
+            self.memory.recent(), reserved=count_tokens(system) + 20)
+        context = "\n".join(lines)
         user_msg = f"Conversation so far:\n{context}\n\nRespond warmly and shortly (30-45 words max)."
 
         reply = None
 
-        # Try API first
-        if self.client:
+        # Try API first, within what is left of the request budget
+        timeout = deadline.timeout('llm')
+        if self.client and timeout:
+            messages = [
+                {'role': 'system', 'content': system},
+                {'role': 'user', 'content': user_msg}
+            ]
             try:
-                response = self.client.chat.completions.create(
-                    model='gpt-4o-mini',
-                    messages=[
-                        {'role': 'system', 'content': system},
-                        {'role': 'user', 'content': user_msg}
-                    ],
-                    max_tokens=100,
-                    temperature=0.8
-                )
-                reply = response.choices[0].message.content.strip()
-
-                # Ensure it's short and doesn't have commanding language
-                reply = self._clean_response(reply)
+                with tracing.span('llm') as span:
+                    if self.speculative:
+                        response = self._speculative_completion(messages, timeout)
+                    else:
+                        response = self._complete(messages, timeout)
+                    if response is not None:
+                        tracing.record_usage(span, response)
+                if response is not None:
+                    reply = response.choices[0].message.content.strip()
+
+                    # Ensure it's short and doesn't have commanding language
+                    reply = self._clean_response(reply)
 
             except Exception as e:
                 print(f"API error (using fallback): {e}")
                 reply = None
 
-        # Fallback if API fails or no client
+        # Fallback if API fails, times out or no client
         if not reply:
+            if self.client:
+                deadline.degrade('llm')
             reply = random.choice(self.DEFAULT_RESPONSES.get(self.phase, self.DEFAULT_RESPONSES['feel']))
 
-        self.memory.append({'role': 'therapist', 'text': reply, 'phase': self.phase})
+        self.memory.append('therapist', reply, self.phase)
         self._advance_phase()
+        self._summarize_chunks_in_background()
 
         return reply
 
+    def _complete(self, messages, timeout):
+        return self.client.chat.completions.create(
+            model='gpt-4o-mini',
+            messages=messages,
+            max_tokens=100,
+            temperature=0.8,
+            timeout=timeout
+        )
+
+    def _speculative_completion(self, messages, timeout):
+        """
+        Run the LLM call but wait at most the current phase's reply budget
+
+        Returns:
+            The completion, or None when the budget ran out (the call keeps
+            running and a late answer is logged in late_replies)
+        """
+        phase = self.phase
+        budget = min(self.REPLY_BUDGETS.get(phase, self.REPLY_BUDGETS['feel']), timeout)
+        if not speculative_slots.acquire(blocking=False):
+            # Every slot holds a running call: answer inline within the budget
+            # instead of queueing behind abandoned ones
+            reply_stats.record(phase, 'saturated')
+            return self._timed_completion(messages, budget, phase)
+
+        # Bind this session's log and turn so a late answer never lands in a cleared session
+        late_replies, turn_id = self.late_replies, len(self.memory) - 1
+        started = []
+
+        def call():
+            started.append(time.monotonic())
+            return self._complete(messages, timeout)
+
+        future = get_background_worker('journal-llm', self.SPECULATIVE_WORKERS).submit(call)
+        future.add_done_callback(lambda f: speculative_slots.release())
+        try:
+            # A slot was free, so the call starts right away and the budget is LLM time
+            response = future.result(timeout=budget)
+        except FutureTimeout:
+            print(f"⏱️ Reply took over {budget}s - using a fallback")
+            reply_stats.record(phase, 'fallbacks')
+            future.add_done_callback(
+                lambda f: self._record_late_reply(late_replies, turn_id, phase, f, started))
+            return None
+        except Exception:
+            reply_stats.record(phase, 'failed')
+            raise
+        reply_stats.record(phase, 'on_time', (time.monotonic() - started[0]) * 1000)
+        return response
+
+    def _timed_completion(self, messages, budget, phase):
+        """Blocking LLM call capped at budget (no late answer to keep)"""
+        started = time.monotonic()
+        try:
+            response = self._complete(messages, budget)
+        except Exception as e:
+            print(f"⏱️ Reply failed within {budget}s ({e}) - using a fallback")
+            reply_stats.record(phase, 'fallbacks')
+            return None
+        reply_stats.record(phase, 'on_time', (time.monotonic() - started) * 1000)
+        return response
+
+    def _record_late_reply(self, late_replies, turn_id, phase, future, started):
+        """Keep an LLM answer that arrived after the fallback was sent"""
+        if future.cancelled() or future.exception() is not None:
+            reply_stats.record(phase, 'failed')
+            return
+        latency_ms = (time.monotonic() - started[0]) * 1000
+        reply_stats.record(phase, 'late', latency_ms)
+        late_replies.append({
+            'turn_id': turn_id,
+            'phase': phase,
+            'reply': self._clean_response(future.result().choices[0].message.content.strip()),
+            'latency_ms': round(latency_ms)
+        })
+
     def _clean_response(self, text):
         """Remove commanding language, trim to 45 words, ensure warmth."""
         # Remove commanding phrases
@@ -260,9 +463,7 @@ class JournalAI:
         Returns sentiment, emotional depth, themes, etc.
         """
         try:
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
+            polarity, subjectivity = nlp.sentiment(text)
 
             # Determine emotional tone
             if polarity < -0.5:
@@ -276,26 +477,11 @@ class JournalAI:
             else:
                 tone = 'positive/hopeful'
 
-            # Extract key themes
-            themes = []
-            theme_keywords = {
-                'loneliness': ['alone', 'lonely', 'isolated', 'no one', 'by myself'],
-                'loss/grief': ['lost', 'missing', 'miss', 'gone', 'breakup', 'break up'],
-                'overwhelm': ['overwhelm', 'too much', 'can\'t handle', 'drowning', 'exhausted'],
-                'uncertainty': ['don\'t know', 'confused', 'unsure', 'lost'],
-                'self-worth': ['worthless', 'not good enough', 'failure', 'stupid']
-            }
-
-            text_lower = text.lower()
-            for theme, keywords in theme_keywords.items():
-                if any(kw in text_lower for kw in keywords):
-                    themes.append(theme)
-
             return {
                 'emotional_tone': tone,
                 'intensity': 'high' if abs(polarity) > 0.6 else 'moderate' if abs(polarity) > 0.3 else 'mild',
                 'subjectivity': 'very personal' if subjectivity > 0.7 else 'balanced' if subjectivity > 0.4 else 'objective',
-                'themes': themes,
+                'themes': self._extract_themes(text),
                 'polarity_score': round(polarity, 2)
             }
 
@@ -308,15 +494,81 @@ class JournalAI:
                 'polarity_score': 0
             }
 
+    def _extract_themes(self, text):
+        """Key themes mentioned in a message (see theme_store.THEMES)"""
+        return self.THEME_MATCHER.match(text)
+
+    def _store_analysis(self, turn, analysis, session_analysis):
+        """Keep a turn's analysis and fold it into the session totals"""
+        with self._analysis_lock:
+            turn.analysis = analysis
+            if analysis['emotional_tone'] != 'unknown':
+                session_analysis.add(analysis)
+
+    def _submit_analysis(self, turn_id, turn):
+        """Analyse a turn on the background worker"""
+        # Bind this session's aggregate so a cleared session is never written to
+        session_analysis, pending = self.session_analysis, self._pending
+
+        def analyse():
+            try:
+                analysis = self._generate_analysis(turn.text)
+                self._store_analysis(turn, analysis, session_analysis)
+            finally:
+                with self._analysis_lock:
+                    pending.pop(turn_id, None)
+            if pending is self._pending:
+                self._checkpoint()
+            if self.on_analysis:
+                self.on_analysis(turn_id, analysis)
+            return analysis
+
+        worker = self.worker or get_background_worker()
+        with self._analysis_lock:
+            pending[turn_id] = worker.submit(analyse)
+
+    def get_analysis(self, turn_id, timeout=None):
+        """
+        Panel analysis for a turn (poll after a background-analysis reply)
+
+        Args:
+            turn_id: 'turn_id' from process_text
+            timeout: Seconds to wait if it is still being computed (None = don't wait)
+
+        Returns:
+            dict: {'turn_id', 'pending', 'analysis'} (analysis is None for crisis turns)
+        """
+        with self._analysis_lock:
+            future = self._pending.get(turn_id)
+        if future is not None and timeout:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+        with self._analysis_lock:
+            pending = turn_id in self._pending
+            turn = self.memory.turns[turn_id] if 0 <= turn_id < len(self.memory) else None
+            analysis = turn.analysis if turn is not None and turn.role == 'user' else None
+        return {'turn_id': turn_id, 'pending': pending, 'analysis': analysis}
+
+    def flush_analysis(self, timeout=None):
+        """Wait for background analyses still in flight"""
+        with self._analysis_lock:
+            futures = [f for f in self._pending.values() if f is not None]
+        if futures:
+            wait(futures, timeout=timeout)
+
     def _crisis_response(self, text):
         """Deterministic, warm crisis response."""
         self.phase = 'crisis'
-        self.memory.append({'role': 'user', 'text': text, 'sentiment': 'crisis', 'phase': 'crisis'})
+        self.memory.append('user', text, 'crisis', 'crisis')
+        self.session_analysis.add_themes(self._extract_themes(text))
 
         helpline_text = self.crisis_helpline.strip() if self.crisis_helpline else "your local crisis helpline or emergency services"
         reply = self.CRISIS_TEMPLATE.format(helpline=helpline_text)
 
-        self.memory.append({'role': 'therapist', 'text': reply, 'phase': 'crisis'})
+        self.memory.append('therapist', reply, 'crisis')
+        self._summarize_chunks_in_background()
 
         # Add crisis analysis
         self.analysis.append({
@@ -336,69 +588,214 @@ class JournalAI:
         idx = phases.index(self.phase) if self.phase in phases else 0
 
         # After 2 exchanges in each phase, move to next
-        phase_count = sum(1 for m in self.memory if m.get('phase') == self.phase)
-        if phase_count >= 4:  # 2 user + 2 therapist exchanges
+        if self.memory.count(self.phase) >= 4:  # 2 user + 2 therapist exchanges
             self.phase = phases[min(idx + 1, len(phases) - 1)]
 
-    def _generate_summary(self):
-        """Generate brief, warm summary of the session."""
+    def _generate_summary(self, deadline):
+        """Generate brief, warm summary of the session (within the deadline's 'chunks' and 'llm' stages)."""
         if not self.memory:
             return "No messages recorded."
 
-        # Extract key themes from all messages
-        themes = []
-        for m in self.memory:
-            if m.get('role') == 'user':
-                analysis = self._generate_analysis(m['text'])
-                themes.extend(analysis.get('themes', []))
-
-        theme_str = ', '.join(set(themes)) if themes else "their feelings"
+        # Themes were counted as each message was analysed
+        themes = list(self.session_analysis.themes)
+        theme_str = ', '.join(themes) if themes else "their feelings"
 
         if self.client:
-            try:
-                history = "\n".join([f"{m['role'].title()}: {m['text']}" for m in self.memory])
-                system = f"Write a brief, warm summary (60 words max) of this journal session in {self._lang_name()}. Be compassionate and human."
-                user_msg = f"Session:\n{history}"
-
-                response = self.client.chat.completions.create(
-                    model='gpt-4o-mini',
-                    messages=[
-                        {'role': 'system', 'content': system},
-                        {'role': 'user', 'content': user_msg}
-                    ],
-                    max_tokens=100,
-                    temperature=0.7
-                )
-                return response.choices[0].message.content.strip()
-            except Exception:
-                pass
+            chunks = self.chunk_summaries
+            if chunks.busy():
+                wait([chunks.future], timeout=deadline.timeout('chunks'))
+            # Chunk summaries plus the few turns not summarised yet (capped in
+            # case summarising fell behind), so the input stays bounded however
+            # long the session ran
+            tail = [t.line() for t in self.memory.turns[chunks.covered:]]
+            recent = "\n".join(self.context_builder.fit_lines(tail)[0])
+            if chunks.summaries:
+                earlier = "\n".join(f"- {s}" for s in chunks.summaries)
+                user_msg = f"Earlier in the session (summarized):\n{earlier}\n\nMost recent messages:\n{recent}"
+            else:
+                user_msg = f"Session:\n{recent}"
+            system = f"Write a brief, warm summary (60 words max) of this journal session in {self._lang_name()}. Be compassionate and human."
+            timeout = deadline.timeout('llm')
+            summary = self._summarize(system, user_msg, max_tokens=100, temperature=0.7,
+                                      timeout=timeout) if timeout else None
+            if summary:
+                return summary
+            deadline.degrade('llm')
 
         # Fallback summary
         return f"You opened up about {theme_str} today. That took courage. You're doing the right thing by being honest with yourself."
 
-    def end_session(self):
-        """End session and return summary + analysis data."""
-        summary = self._generate_summary()
+    def _summarize(self, system, user_msg, max_tokens, temperature=0.3, timeout=None):
+        """One summary completion (None if the API fails or takes longer than timeout, default SUMMARY_TIMEOUT)"""
+        try:
+            response = self.client.chat.completions.create(
+                model='gpt-4o-mini',
+                messages=[
+                    {'role': 'system', 'content': system},
+                    {'role': 'user', 'content': user_msg}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout or self.SUMMARY_TIMEOUT
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"❌ Summary Error: {e}")
+            return None
+
+    def _summarize_chunks_in_background(self):
+        """Start summarising finished chunks of the transcript (one job per session at a time)"""
+        chunks = self.chunk_summaries
+        if self.client and chunks.due(len(self.memory)) and not chunks.busy():
+            worker = self.worker or get_background_worker('journal-summary', self.SUMMARY_WORKERS)
+            chunks.future = worker.submit(self._summarize_chunks, self.memory, chunks)
+
+    def _summarize_chunks(self, memory, chunks):
+        """Map step: summarise each full chunk; reduce step: merge old chunk summaries"""
+        while chunks.due(len(memory)):
+            turns = memory.turns[chunks.covered:chunks.covered + chunks.chunk]
+            summary = self._summarize(
+                "Summarize this part of a journal session in 2-3 sentences: feelings, events and "
+                "people mentioned. Third person, no advice.",
+                "\n".join(t.line() for t in turns), max_tokens=120)
+            if not summary:
+                summary = '; '.join(t.text[:60] for t in turns if t.role == 'user')
+            # Together under the lock so a checkpoint never pairs a summary with a stale covered
+            with self._analysis_lock:
+                chunks.summaries.append(summary[:self.CHUNK_SUMMARY_MAX_CHARS])
+                chunks.covered += len(turns)
+
+            if len(chunks.summaries) > self.MAX_CHUNK_SUMMARIES:
+                older = "\n".join(f"- {s}" for s in chunks.summaries[:-1])
+                merged = self._summarize(
+                    "Merge these consecutive summaries of one journal session into one summary of "
+                    "3-4 sentences. Keep feelings, events and people.", older, max_tokens=160)
+                with self._analysis_lock:
+                    chunks.summaries = [(merged or older)[:self.CHUNK_SUMMARY_MAX_CHARS * 2], chunks.summaries[-1]]
+
+    def end_session(self, deadline=None):
+        """End session and return summary + analysis data (within END_SESSION_BUDGET unless a deadline is given)."""
+        deadline = deadline or Deadline(self.END_SESSION_BUDGET, stages=('analysis', 'chunks', 'llm'),
+                                        shares=self.END_SESSION_SHARES)
+        self.flush_analysis(timeout=deadline.timeout('analysis'))
+        summary = self._generate_summary(deadline)
+
+        # One point per session in the user's long-term theme/mood series
+        if self.trend_store is not None and self.user_id and self.memory.role_counts['user']:
+            self.trend_store.add(self.user_id, self.session_analysis.mean_polarity, self.session_analysis.themes)
+
+        # The session is over, so there is nothing left to resume
+        self._drop_checkpoint(discard=True)
 
         return {
             'summary': summary,
             'final_message': self.MESSAGES['final'][self.language],
-            'total_exchanges': len([m for m in self.memory if m['role'] == 'user']),
-            'analysis_data': self.analysis  # Can be used by frontend for analytics
+            'total_exchanges': self.memory.role_counts['user'],
+            'analysis_data': self.analysis,  # Can be used by frontend for analytics
+            'session_analysis': self.session_analysis.to_dict(),
+            'late_replies': list(self.late_replies)
         }
 
-    def clear_memory(self):
-        self.memory = []
+    def open_checkpoint(self, filepath):
+        """
+        Resume the session checkpointed at filepath (if any) and checkpoint
+        there after every turn until the session ends
+        """
+        self.close_checkpoint()
+        self.checkpoint = SessionCheckpoint(filepath)
+        turns, state = self.checkpoint.restore()
+        if state is not None:
+            self._restore(turns, state)
+            print(f"✅ Resumed journal session ({len(self.memory)} messages, phase {self.phase})")
+
+    def close_checkpoint(self):
+        """Stop checkpointing (the snapshot stays on disk for the next worker)"""
+        if self.checkpoint is not None:
+            self.flush_analysis(timeout=self.ANALYSIS_FLUSH_TIMEOUT)
+            self._checkpoint()
+            self._drop_checkpoint(discard=False)
+
+    def _drop_checkpoint(self, discard):
+        """Stop checkpointing; background jobs still running then skip their save"""
+        with self._checkpoint_lock:
+            if self.checkpoint is not None:
+                if discard:
+                    self.checkpoint.discard()
+                else:
+                    self.checkpoint.close()
+                self.checkpoint = None
+
+    def _checkpoint(self):
+        """Append new turns and the session state to the checkpoint"""
+        with self._checkpoint_lock:
+            if self.checkpoint is None:
+                return
+            with self._analysis_lock:
+                # Turns still waiting for background analysis stay in the state
+                # record until it lands, so each turn is written only once
+                settled = min(self._pending) if self._pending else len(self.memory)
+                turns = self.memory.turns
+                new = [t.to_dict() for t in turns[self.checkpoint.written:settled]]
+                tail = [t.to_dict() for t in turns[max(settled, self.checkpoint.written):]]
+                analysis_state = self.session_analysis.state()
+                chunk_summaries = list(self.chunk_summaries.summaries)
+                chunks_covered = self.chunk_summaries.covered
+            state = {
+                'phase': self.phase,
+                'language': self.language,
+                'entry_start': self.entry_start.isoformat(),
+                'session_analysis': analysis_state,
+                'chunk_summaries': chunk_summaries,
+                'chunks_covered': chunks_covered,
+                'crisis_events': list(self.analysis),
+                'tail': tail
+            }
+            self.checkpoint.save(new, state)
+
+    def _restore(self, turns, state):
+        """Rebuild the session from a checkpoint (no LLM or sentiment calls)"""
+        self.clear_memory(discard_checkpoint=False)
+        for entry in turns + state['tail']:
+            turn = self.memory.append(entry['role'], entry['text'], entry['phase'], entry.get('sentiment'))
+            turn.analysis = entry.get('analysis')
+        self.phase = state['phase']
+        self.language = state['language']
+        self.entry_start = datetime.fromisoformat(state['entry_start'])
+        self.session_analysis = SessionAnalysis.from_state(state['session_analysis'])
+        self.chunk_summaries.summaries = state['chunk_summaries']
+        self.chunk_summaries.covered = state['chunks_covered']
+        self.analysis = state['crisis_events']
+
+    def clear_memory(self, discard_checkpoint=True):
+        if discard_checkpoint and self.checkpoint is not None:
+            # Cleared on purpose: forget the snapshot but keep checkpointing there
+            with self._checkpoint_lock:
+                self.checkpoint.discard()
+        self.late_replies = deque(maxlen=self.LATE_REPLY_HISTORY)
+        self.memory = Transcript(self.MAX_CONTEXT_MESSAGES, self.context_builder.prepare_line)
+        self.session_analysis = SessionAnalysis()
+        self.chunk_summaries = ChunkSummaries(self.SUMMARY_CHUNK)
+        self._pending = {}
         self.phase = 'feel'
         self.entry_start = datetime.now()
 
     def get_memory(self):
-        return self.memory
+        return [t.to_dict() for t in self.memory]
+
+    def estimate_memory_bytes(self):
+        """Rough RAM footprint of this session (used by SessionManager)"""
+        return 2048 + self.memory.nbytes() + 512 * len(self.analysis)
 
     def _lang_name(self):
         return {'en': 'English', 'hi': 'Hindi', 'pt': 'Portuguese'}.get(self.language, 'English')
 
 
+# Shared by every speculative session: one slot per 'journal-llm' worker, so a
+# submitted call never waits in the pool queue and abandoned calls stay bounded
+speculative_slots = threading.BoundedSemaphore(JournalAI.SPECULATIVE_WORKERS)
+reply_stats = ReplyStats()
+
+
 # CLI Interface
 def main():
     print("\n" + "="*60)
@@ -407,6 +804,7 @@ def main():
     print("Type 'quit' to exit | 'done' to finish session\n")
 
     journal = JournalAI()
+    warmup(connections=journal.client is not None)
 
     print("Pick a language: 1=English, 2=Hindi, 3=Portuguese")
     lang = {'1': 'en', '2': 'hi', '3': 'pt'}.get(input("Choice (1-3): ").strip(), 'en')
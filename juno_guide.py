@@ -104,23 +104,62 @@ class JunoGuide:
         }
     }
     
+    # Minimum top score (one tag match) for a confident answer
+    CONFIDENT_SCORE = 3
+    
     def __init__(self):
         self.current_page = 'HomePage'
     
     def guide(self, user_input):
         """Main guide function - understands user intent and responds conversationally"""
+        return self.answer(user_input)['text']
+    
+    def answer(self, user_input):
+        """
+        Templated answer plus how sure we are about it
+        
+        Returns:
+            dict: {'text', 'page', 'intent', 'confidence'} where intent is
+                'navigation', 'actions', 'location' or 'search' (open-ended)
+                and confidence is 0-1
+        """
         user_lower = user_input.lower().strip()
+        matching_pages = self._search_pages(user_lower)
 
         if self._is_navigation_intent(user_lower):
-            return self._handle_navigation(user_lower)
-
-        if self._is_action_intent(user_lower):
-            return self._handle_actions(user_lower)
-        
-        if self._is_location_intent(user_lower):
-            return self._handle_location(user_lower)
+            intent, text = 'navigation', self._handle_navigation(user_lower, matching_pages)
+        elif self._is_action_intent(user_lower):
+            intent, text = 'actions', self._handle_actions(user_lower, matching_pages)
+        elif self._is_location_intent(user_lower):
+            intent, text = 'location', self._handle_location(user_lower, matching_pages)
+        else:
+            intent, text = 'search', self._search_and_suggest(user_lower, matching_pages)
         
-        return self._search_and_suggest(user_lower)
+        return {
+            'text': text,
+            'page': matching_pages[0][0] if matching_pages else None,
+            'intent': intent,
+            'confidence': self._confidence(matching_pages)
+        }
+    
+    def templated_answers(self):
+        """Yield (page, intent, text) for every query-independent templated answer"""
+        handlers = {
+            'navigation': self._handle_navigation,
+            'actions': self._handle_actions,
+            'location': self._handle_location
+        }
+        for page_name, data in self.GUIDES.items():
+            for intent, handler in handlers.items():
+                yield page_name, intent, handler('', [(page_name, data, self.CONFIDENT_SCORE)])
+    
+    def _confidence(self, matching_pages):
+        """Margin of the top match over the runner-up, scaled down for weak matches"""
+        if not matching_pages:
+            return 0.0
+        top = matching_pages[0][2]
+        second = matching_pages[1][2] if len(matching_pages) > 1 else 0
+        return (top - second) / top * min(1.0, top / self.CONFIDENT_SCORE)
     
     def _is_navigation_intent(self, query):
         """Check if user wants to navigate/go to a page"""
@@ -157,9 +196,10 @@ class JunoGuide:
         
         return sorted(results, key=lambda x: x[2], reverse=True)
     
-    def _handle_navigation(self, query):
+    def _handle_navigation(self, query, matching_pages=None):
         """Handle navigation requests"""
-        matching_pages = self._search_pages(query)
+        if matching_pages is None:
+            matching_pages = self._search_pages(query)
         
         if not matching_pages:
             return "I couldn't find that page. Try asking about: breathing, journaling, music, faith, profile, or mind tools."
@@ -177,9 +217,10 @@ class JunoGuide:
         
         return response
     
-    def _handle_actions(self, query):
+    def _handle_actions(self, query, matching_pages=None):
         """Handle action/feature requests"""
-        matching_pages = self._search_pages(query)
+        if matching_pages is None:
+            matching_pages = self._search_pages(query)
         
         if not matching_pages:
             return " I couldn't find that feature. Try asking about specific actions like: breathing, journaling, tracking mood, etc."
@@ -193,9 +234,10 @@ class JunoGuide:
         response += f"\n How to get there: {page_data['how_to_reach']}"
         return response
     
-    def _handle_location(self, query):
+    def _handle_location(self, query, matching_pages=None):
         """Handle location/navigation queries"""
-        matching_pages = self._search_pages(query)
+        if matching_pages is None:
+            matching_pages = self._search_pages(query)
         
         if not matching_pages:
             return " I couldn't find that. Try asking how to reach: breathing, journal, profile, music, etc."
@@ -208,9 +250,10 @@ class JunoGuide:
         response += f"\n{page_data['overview']}"
         return response
     
-    def _search_and_suggest(self, query):
+    def _search_and_suggest(self, query, matching_pages=None):
         """Default search and suggest"""
-        matching_pages = self._search_pages(query)
+        if matching_pages is None:
+            matching_pages = self._search_pages(query)
         
         if not matching_pages:
             return f" I don't have info about '{query}'. Try asking about: breathing, journaling, mood tracking, music, prayer, achievements, or wellness tools."
@@ -0,0 +1,123 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Tuple
+
+from clients import get_voice_engine
+
+
+class LazyAudio:
+    """
+    Replies whose speech is synthesized only when a client asks for it
+
+    handle() is free: it just records what to say. The first get() for a
+    reply runs TTS; concurrent fetches of the same text and voice wait for
+    that one call (single-flight), and the result is cached so repeated
+    replies (fallbacks, greetings) are synthesized once.
+    """
+
+    def __init__(self, voice=None, max_handles: int = 5000, ttl: float = 600.0, max_audio_mb: float = 64):
+        """
+        Args:
+            voice: VoiceEngine used for synthesis (default: the shared one from clients.py)
+            max_handles: Unfetched handles kept before the oldest are dropped
+            ttl: Seconds a handle stays fetchable
+            max_audio_mb: Budget for cached audio (least recently used is evicted)
+        """
+        self.voice = voice or get_voice_engine()
+        self.max_handles = max_handles
+        self.ttl = ttl
+        self.max_audio_bytes = int(max_audio_mb * 1024 * 1024)
+        self.syntheses = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._handles = OrderedDict()
+        self._audio = OrderedDict()
+        self._audio_bytes = 0
+        self._inflight = {}
+
+    def handle(self, text: str, lang: str = 'en', gender: str = 'female') -> Optional[str]:
+        """Id to fetch the spoken reply with later (None for empty text)"""
+        if not text:
+            return None
+        audio_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._handles[audio_id] = (time.monotonic(), (text, lang, gender))
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+        return audio_id
+
+    def get(self, audio_id: str, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Audio for a handle, synthesizing it on first fetch
+
+        Args:
+            audio_id: Id from handle()
+            timeout: Seconds for the TTS call (default: the voice engine's)
+
+        Returns:
+            bytes: Audio (b'' if synthesis failed), or None for an unknown or expired handle
+        """
+        with self._lock:
+            self._expire()
+            item = self._handles.get(audio_id)
+            if item is None:
+                return None
+            key = item[1]
+            audio = self._audio.get(key)
+            if audio is not None:
+                self._audio.move_to_end(key)
+                self.hits += 1
+                return audio
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self.hits += 1
+            return future.result()
+        try:
+            audio = self._synthesize(key, timeout)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        future.set_result(audio)
+        return audio
+
+    def stats(self) -> dict:
+        return {
+            'handles': len(self._handles),
+            'cached': len(self._audio),
+            'audio_bytes': self._audio_bytes,
+            'syntheses': self.syntheses,
+            'hits': self.hits
+        }
+
+    def _synthesize(self, key: Tuple[str, str, str], timeout: Optional[float]) -> bytes:
+        text, lang, gender = key
+        try:
+            audio = self.voice.text_to_speech(text, lang, gender, timeout=timeout) or b''
+        except Exception as e:
+            print(f"❌ TTS Error: {e}")
+            audio = b''
+        with self._lock:
+            self.syntheses += 1
+            # Failures are not cached, so the next fetch tries again
+            if audio and len(audio) <= self.max_audio_bytes:
+                self._audio[key] = audio
+                self._audio_bytes += len(audio)
+                while self._audio_bytes > self.max_audio_bytes:
+                    _, dropped = self._audio.popitem(last=False)
+                    self._audio_bytes -= len(dropped)
+        return audio
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._handles:
+            created, _ = next(iter(self._handles.values()))
+            if created >= cutoff:
+                break
+            self._handles.popitem(last=False)
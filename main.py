@@ -1,74 +1,190 @@
-from openai import OpenAI
-from textblob import TextBlob
 import json
 from datetime import datetime
 import os
-from typing import List, Dict, Optional, Union
-from dotenv import load_dotenv
-load_dotenv()
+from collections import Counter, deque
+from concurrent.futures import wait
+from typing import TYPE_CHECKING, List, Dict, Optional, Union
+import nlp
+import tracing
+from background import get_background_worker
+from clients import get_openai_client, get_voice_engine
 from voice import VoiceEngine
 from prompt import Prompts
 from juno_guide import JunoGuide
+from memory_store import MemoryLog
+from context_builder import ContextBuilder
+from guide_cache import GuideCache
+from text_index import HashingVectorizer, VectorIndex
+from deadline import Deadline, speak
+from crisis_detector import CrisisDetector
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 class JunoAssistant:
-    """Main AI orchestrator with dual AI and unlimited memory"""
+    """Main AI orchestrator with dual AI, a bounded working memory and rolling summaries"""
     CRISIS_KEYWORDS = [
         'suicide', 'kill myself', 'end it all', 'hurt myself', 'self harm',
         'cutting', 'die', 'worthless', 'want to die', 'better off dead',
         'no point living', 'hate myself', 'end my life'
     ]
+    CRISIS_DETECTOR = CrisisDetector(CRISIS_KEYWORDS, word_boundaries=False)
     
     TRAUMA_KEYWORDS = [
         'abuse', 'assault', 'sexually', 'raped', 'molested', 'attacked',
         'traumatized', 'violated', 'trauma'
     ]
     
-    def __init__(self):
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in .env file!")
-        
-        self.client = OpenAI(api_key=api_key)
-        self.voice = VoiceEngine()
-        self.prompts = Prompts()
-        self.juno_guide = JunoGuide()
+    # Turns kept in RAM; older turns are folded into the rolling summary
+    MEMORY_WINDOW = 40
+    SUMMARY_CHUNK = 20
+    SUMMARY_MAX_CHARS = 1200
+    
+    # get_stats 'moods': the most recent turn moods, in conversation order
+    RECENT_MOODS = 40
+    
+    # Guide questions at or above this JunoGuide confidence skip the LLM
+    GUIDE_FAST_PATH_CONFIDENCE = 0.5
+    
+    # Prompt token budgets per handler (system prompts + history + user turn)
+    CONTEXT_BUDGETS = {'juno': 1800, 'coach': 1000}
+    
+    # Rolling summaries run on their own background pool, never inside a request
+    SUMMARY_TIMEOUT = 10.0
+    SUMMARY_WORKERS = 4
+    
+    # Long-term recall: earlier turns from the memory log relevant to the new message
+    RECALL_K = 3
+    RECALL_MIN_SCORE = 0.1
+    RECALL_MAX_CHARS = 200
+    RECALL_WORKERS = 2
+    
+    def __init__(self, client: Optional['OpenAI'] = None, voice: Optional[VoiceEngine] = None,
+                 prompts: Optional[Prompts] = None, juno_guide: Optional[JunoGuide] = None,
+                 guide_cache: Optional[GuideCache] = None):
+        """
+        Args:
+            client, voice: Default to the process-wide instances from clients.py
+            prompts, juno_guide, guide_cache: Shared instances to reuse (e.g. from
+                SessionManager); each one is created when not given
+        """
+        self.client = client or get_openai_client()
+        self.voice = voice or get_voice_engine()
+        self.prompts = prompts or Prompts()
+        self.context_builders = {k: ContextBuilder(v) for k, v in self.CONTEXT_BUDGETS.items()}
+        self.juno_guide = juno_guide or JunoGuide()
+        self.guide_cache = guide_cache or GuideCache(self.juno_guide.GUIDES)
         self.memory = []
+        self.memory_log = None
+        self._memory_index = None
+        self._index_job = None
+        self.summary = ''
+        self._summary_job = None
+        self.turn_count = 0
+        self._reset_stats()
         self.context = {'greeted': False, 'spiritual_tier': 1}    
+        # Set to False for text-only replies (e.g. batch runs without TTS)
+        self.speak_replies = True
         print("✅ Juno Assistant initialized successfully")
     
-    def process_voice(self, audio_data: bytes, context: str = 'juno') -> dict:
+    def process_voice(self, audio_data: bytes, context: str = 'juno',
+                      deadline: Optional[Deadline] = None) -> dict:
         """
         Main voice processing pipeline with context awareness
         
         Args:
             audio_data: Audio bytes from user
             context: 'juno' (default), 'coach', or 'journal'
+            deadline: Request budget split across STT/LLM/TTS (default: Deadline.for_voice())
         
         Returns:
-            dict: Response with text, audio, mood, etc.
+            dict: Response with text, audio, mood, etc. 'degraded' lists the
+                stages that fell back because they failed or ran out of time;
+                'timings' holds per-stage latency when the request is traced
         """
-        stt = self.voice.speech_to_text(audio_data)
-        text = stt['text']
-        lang = stt['language']
+        deadline = deadline or Deadline.for_voice()
+        with tracing.trace('juno.voice') as trace:
+            timeout = deadline.timeout('stt')
+            with tracing.span('stt'):
+                stt = self.voice.speech_to_text(audio_data, timeout=timeout) if timeout else {'text': '', 'language': 'en'}
+            text = stt['text']
+            lang = stt['language']
 
-        if not text:
-            return self._error("I couldn't hear you clearly", lang)
+            if not text:
+                deadline.degrade('stt')
+                result = self._error("I couldn't hear you clearly", lang, deadline)
+            else:
+                result = self.process_text(text, lang, context, deadline)
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
+    
+    def process_text(self, text: str, lang: str = 'en', context: str = 'juno',
+                     deadline: Optional[Deadline] = None) -> dict:
+        """
+        Text pipeline (also used by process_voice after speech-to-text)
         
-        if self._is_crisis(text):
-            return self._handle_crisis(text, lang)
-        elif self._is_guide_query(text):
-            return self._handle_guide(text, lang)
-        else:
-            return self._handle_contextual(text, lang, context)
+        Args:
+            text: User message
+            lang: 'en', 'hi', or 'pt'
+            context: 'juno' (default), 'coach', or 'journal'
+            deadline: Request budget split across LLM/TTS (default: Deadline.for_text())
+        
+        Returns:
+            dict: Response with text, audio, mood, etc.
+        """
+        deadline = deadline or Deadline.for_text()
+        text = (text or '').strip()
+        if not text:
+            return self._error("Please share what's on your mind", lang, deadline)
+        
+        with tracing.trace('juno.text') as trace:
+            with tracing.span('classify'):
+                route = 'crisis' if self._is_crisis(text) else 'guide' if self._is_guide_query(text) else context
+            if route == 'crisis':
+                result = self._handle_crisis(text, lang, deadline)
+            elif route == 'guide':
+                result = self._handle_guide(text, lang, deadline)
+            else:
+                result = self._handle_contextual(text, lang, context, deadline)
+        result['degraded'] = deadline.degraded
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
     
-    def _handle_contextual(self, text: str, lang: str, context: str) -> dict:
+    def _handle_contextual(self, text: str, lang: str, context: str, deadline: Deadline) -> dict:
         """Route to appropriate AI based on context"""
         if context == 'coach':
-            return self._handle_coach(text, lang)
+            return self._handle_coach(text, lang, deadline)
         else:
-            return self._handle_juno(text, lang)
+            return self._handle_juno(text, lang, deadline)
     
-    def _handle_juno(self, text: str, lang: str) -> dict:
+    def _complete(self, messages: list, max_tokens: int, temperature: float,
+                  deadline: Deadline, fallback: str) -> str:
+        """Chat completion within the LLM stage budget (fallback text on timeout or error)"""
+        timeout = deadline.timeout('llm')
+        if timeout:
+            try:
+                with tracing.span('llm') as span:
+                    response = self.client.chat.completions.create(
+                        model='gpt-4o-mini',
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        timeout=timeout
+                    )
+                    tracing.record_usage(span, response)
+                return response.choices[0].message.content
+            except Exception as e:
+                print(f"❌ LLM Error (using fallback): {e}")
+        deadline.degrade('llm')
+        return fallback
+    
+    def _speak(self, text: str, lang: str, gender: str, deadline: Deadline) -> bytes:
+        """speak() unless replies are text-only (speak_replies off)"""
+        return speak(self.voice, text, lang, gender, deadline) if self.speak_replies else b''
+    
+    def _handle_juno(self, text: str, lang: str, deadline: Deadline) -> dict:
         """Main Juno AI - Christian wellness conversations with tiered responses"""
         
         sentiment = self._get_sentiment(text)
@@ -77,33 +193,29 @@ class JunoAssistant:
         system_prompt = self.prompts.get('juno', lang)
         tier_guidance = self._get_tier_guidance(tier)
         
-        messages = [
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'system', 'content': tier_guidance}
-        ]
+        system_prompts = [system_prompt, tier_guidance]
 
         if self.memory and not self.context['greeted']:
             last = self.memory[-1]['user'][:80]
-            messages.append({
-                'role': 'system', 
-                'content': f"Returning user. Last talked about: {last}"
-            })
+            system_prompts.append(f"Returning user. Last talked about: {last}")
             self.context['greeted'] = True
 
-        for m in self.memory[-10:]:
-            messages.append({'role': 'user', 'content': m['user']})
-            messages.append({'role': 'assistant', 'content': m['assistant']})
-        
-        messages.append({'role': 'user', 'content': text})
-        response = self.client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=messages,
-            max_tokens=250,
-            temperature=0.8
-        )
+        if self.summary:
+            system_prompts.append(f"Summary of earlier conversations: {self.summary}")
+
+        with tracing.span('recall'):
+            recalled = self._recall(text)
+        if recalled:
+            n = self.RECALL_MAX_CHARS
+            system_prompts.append("Relevant earlier conversations:\n" + "\n".join(
+                f"- User: {m['user'][:n]} / You: {m['assistant'][:n]}" for m in recalled))
+
+        history = [(m['user'], m['assistant']) for m in self.memory]
+        with tracing.span('context'):
+            messages, context_tokens = self.context_builders['juno'].build_messages(system_prompts, history, text)
         
-        reply = response.choices[0].message.content
-        audio = self.voice.text_to_speech(reply, lang, 'female')
+        reply = self._complete(messages, 250, 0.8, deadline, self.prompts.get('fallback', lang))
+        audio = self._speak(reply, lang, 'female', deadline)
         
         self.context['spiritual_tier'] = max(self.context['spiritual_tier'], tier)
         self._save_memory(text, reply, sentiment, lang, 'juno', tier)
@@ -115,33 +227,22 @@ class JunoAssistant:
             'audio': audio,
             'mood': sentiment['mood'],
             'lang': lang,
-            'tier': tier
+            'tier': tier,
+            'context_tokens': context_tokens
         }
     
-    def _handle_coach(self, text: str, lang: str) -> dict:
+    def _handle_coach(self, text: str, lang: str, deadline: Deadline) -> dict:
         """Life Coach AI - Christian motivational guidance"""
         
         sentiment = self._get_sentiment(text)
         system_prompt = self.prompts.get('coach', lang)
         
-        messages = [{'role': 'system', 'content': system_prompt}]
-        
-        for m in self.memory[-5:]:
-            if m.get('ai_type') == 'coach':
-                messages.append({'role': 'user', 'content': m['user']})
-                messages.append({'role': 'assistant', 'content': m['assistant']})
-        
-        messages.append({'role': 'user', 'content': text})
-        
-        response = self.client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=messages,
-            max_tokens=250,
-            temperature=0.7
-        )
+        history = [(m['user'], m['assistant']) for m in self.memory if m.get('ai_type') == 'coach']
+        with tracing.span('context'):
+            messages, context_tokens = self.context_builders['coach'].build_messages([system_prompt], history, text)
         
-        reply = response.choices[0].message.content
-        audio = self.voice.text_to_speech(reply, lang, 'male')
+        reply = self._complete(messages, 250, 0.7, deadline, self.prompts.get('fallback', lang))
+        audio = self._speak(reply, lang, 'male', deadline)
         
         self._save_memory(text, reply, sentiment, lang, 'coach', 5)
         
@@ -151,28 +252,63 @@ class JunoAssistant:
             'reply': reply,
             'audio': audio,
             'mood': sentiment['mood'],
-            'lang': lang
+            'lang': lang,
+            'context_tokens': context_tokens
         }
     
-    def _handle_guide(self, text: str, lang: str) -> dict:
-        """Guide AI - App features"""
-        app_info = self.juno_guide.guide(text)
-        system_prompt = self.prompts.get('guide', lang)
-        
-        messages = [
-            {'role': 'system', 'content': system_prompt},
-            {'role': 'user', 'content': f"Question: {text}\n\nApp Info:\n{app_info}\n\nExplain using both app details and your AI knowledge."}
-        ]
+    def _handle_guide(self, text: str, lang: str, deadline: Deadline) -> dict:
+        """Guide AI - App features (templated fast path, then cache, then LLM)"""
+        guide = self.juno_guide.answer(text)
+        app_info = guide['text']
+        
+        # Templates are English, so other languages still go through the LLM
+        if (lang == 'en' and guide['intent'] != 'search'
+                and guide['confidence'] >= self.GUIDE_FAST_PATH_CONFIDENCE):
+            return self._handle_guide_template(text, lang, app_info, deadline)
+        
+        self.guide_cache.validate(self.juno_guide.GUIDES)
+        cached = self.guide_cache.get(text, lang, app_info)
+        
+        if cached:
+            reply = cached['reply']
+            audio = cached['audio']
+            if audio is None:
+                audio = self._speak(reply, lang, 'female', deadline)
+                self.guide_cache.set_audio(text, lang, audio)
+        else:
+            system_prompt = self.prompts.get('guide', lang)
+            
+            messages = [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': f"Question: {text}\n\nApp Info:\n{app_info}\n\nExplain using both app details and your AI knowledge."}
+            ]
+            
+            # The JunoGuide answer itself is the fallback; it is not cached
+            reply = self._complete(messages, 180, 0.7, deadline, self._speech_text(app_info))
+            audio = self._speak(reply, lang, 'female', deadline)
+            if 'llm' not in deadline.degraded:
+                self.guide_cache.put(text, lang, app_info, reply, audio)
         
-        response = self.client.chat.completions.create(
-            model='gpt-4o-mini',
-            messages=messages,
-            max_tokens=180,
-            temperature=0.7
-        )
+        self._save_memory(text, f"[Guide] {reply}", {'mood': 'neutral'}, lang, 'guide', 0)
         
-        reply = response.choices[0].message.content
-        audio = self.voice.text_to_speech(reply, lang, 'female')
+        return {
+            'type': 'guide',
+            'text': text,
+            'reply': reply,
+            'audio': audio,
+            'mood': 'neutral',
+            'lang': lang,
+            'cached': cached is not None,
+            'templated': False
+        }
+    
+    def _handle_guide_template(self, text: str, lang: str, reply: str, deadline: Deadline) -> dict:
+        """Answer an unambiguous navigation question straight from JunoGuide"""
+        self.guide_cache.validate(self.juno_guide.GUIDES)
+        audio = self.guide_cache.get_template_audio(reply, lang)
+        if audio is None:
+            audio = self._speak(self._speech_text(reply), lang, 'female', deadline)
+            self.guide_cache.put_template_audio(reply, lang, audio)
         
         self._save_memory(text, f"[Guide] {reply}", {'mood': 'neutral'}, lang, 'guide', 0)
         
@@ -182,14 +318,29 @@ class JunoAssistant:
             'reply': reply,
             'audio': audio,
             'mood': 'neutral',
-            'lang': lang
+            'lang': lang,
+            'cached': False,
+            'templated': True
         }
     
-    def _handle_crisis(self, text: str, lang: str) -> dict:
+    def prerender_guide_audio(self, lang: str = 'en'):
+        """Synthesize audio for every templated guide answer ahead of traffic"""
+        self.guide_cache.validate(self.juno_guide.GUIDES)
+        for page, intent, reply in self.juno_guide.templated_answers():
+            if self.guide_cache.get_template_audio(reply, lang) is None:
+                audio = self.voice.text_to_speech(self._speech_text(reply), lang, 'female')
+                self.guide_cache.put_template_audio(reply, lang, audio)
+    
+    @staticmethod
+    def _speech_text(text: str) -> str:
+        """Strip markdown markers before text-to-speech"""
+        return text.replace('**', '').replace('🔸', '').strip()
+    
+    def _handle_crisis(self, text: str, lang: str, deadline: Deadline) -> dict:
         """Crisis response with Christian comfort"""
         
         reply = self.prompts.get('crisis', lang)
-        audio = self.voice.text_to_speech(reply, lang, 'female')
+        audio = self._speak(reply, lang, 'female', deadline)
         
         self._save_memory(text, f"[Crisis] {reply}", {'mood': 'crisis'}, lang, 'crisis', 1)
         
@@ -251,7 +402,7 @@ class JunoAssistant:
     
     def _is_crisis(self, text: str) -> bool:
         """Check for crisis keywords"""
-        return any(k in text.lower() for k in self.CRISIS_KEYWORDS)
+        return self.CRISIS_DETECTOR.is_crisis(text)
     
     def _is_guide_query(self, text: str) -> bool:
         """Check if asking about app features"""
@@ -264,8 +415,8 @@ class JunoAssistant:
     
     def _get_sentiment(self, text: str) -> dict:
         """Analyze sentiment"""
-        blob = TextBlob(text)
-        p = blob.sentiment.polarity
+        with tracing.span('sentiment'):
+            p = nlp.polarity(text)
         
         if p > 0.3: mood = 'happy'
         elif p > 0: mood = 'calm'
@@ -276,8 +427,8 @@ class JunoAssistant:
         return {'mood': mood, 'polarity': p}
     
     def _save_memory(self, user: str, assistant: str, sentiment: dict, lang: str, ai_type: str, tier: int = 0):
-        """Store in unlimited memory"""
-        self.memory.append({
+        """Store in working memory (appends one record to the memory log, if attached)"""
+        entry = {
             'timestamp': datetime.now().isoformat(),
             'user': user,
             'assistant': assistant,
@@ -285,46 +436,331 @@ class JunoAssistant:
             'lang': lang,
             'ai_type': ai_type,
             'tier': tier
-        })
+        }
+        with tracing.span('persist'):
+            self.memory.append(entry)
+            self.turn_count += 1
+            self._update_stats(entry)
+            if self.memory_log is not None:
+                seq = self.memory_log.append_turn(entry)
+                self._index_turn(seq, entry)
+        self._compact_memory()
     
-    def _error(self, msg: str, lang: str) -> dict:
+    def _recall(self, text: str) -> list:
+        """
+        Earlier turns most relevant to text, oldest first
+
+        Only turns that already left the working memory are returned, so the
+        recent window is never duplicated. Needs an attached memory log.
+        """
+        index = self._get_memory_index()
+        if index is None or not len(index):
+            return []
+        window_start = len(self.memory_log) - len(self.memory)
+        hits = index.search(text, k=self.RECALL_K + len(self.memory), min_score=self.RECALL_MIN_SCORE)
+        seqs = [seq for seq, _ in hits if seq < window_start][:self.RECALL_K]
+        return [self.memory_log.read_turn(seq) for seq in sorted(seqs)]
+    
+    def _get_memory_index(self, timeout: float = 0) -> Optional[VectorIndex]:
+        """
+        Recall index over the memory log (document id = turn seq)
+
+        The index is built on a background worker (it reads and parses the
+        whole log), so this returns None until it is ready, waiting up to
+        timeout for it.
+        """
+        if self.memory_log is None:
+            return None
+        if self._memory_index is None:
+            if self._index_job is None or self._index_job[1] is not self.memory_log:
+                worker = get_background_worker('juno-recall', self.RECALL_WORKERS)
+                self._index_job = (worker.submit(self._build_memory_index, self.memory_log), self.memory_log)
+            self._adopt_memory_index(timeout)
+        return self._memory_index
+    
+    def _adopt_memory_index(self, timeout: float):
+        """Take over the built index once the job is done and add turns logged meanwhile"""
+        future, log = self._index_job
+        wait([future], timeout=timeout)
+        if not future.done():
+            return
+        self._index_job = None
+        try:
+            index, indexed = future.result()
+        except Exception as e:
+            print(f"❌ Recall index error: {e}")
+            return
+        for entry in log.read_turns(indexed):
+            index.add(self._recall_text(entry))
+        self._memory_index = index
+    
+    def _build_memory_index(self, log: MemoryLog) -> tuple:
+        """Index every turn of log (runs on the 'juno-recall' pool); returns (index, turns indexed)"""
+        index = self._new_memory_index()
+        indexed = 0
+        for entry in log.iter_turns():
+            index.add(self._recall_text(entry))
+            indexed += 1
+        return index, indexed
+    
+    def _index_turn(self, seq: int, entry: dict):
+        """Add a freshly logged turn to the recall index (if it has been built)"""
+        if self._memory_index is not None and self._memory_index.add(self._recall_text(entry)) != seq:
+            self._memory_index = None
+    
+    @staticmethod
+    def _new_memory_index() -> VectorIndex:
+        # Words and bigrams only (no char n-grams) to keep postings small; common
+        # terms are pruned and long posting lists capped so search stays bounded
+        return VectorIndex(HashingVectorizer(char_ngram=0), idf=True, max_df=0.2, max_postings=4096)
+    
+    @staticmethod
+    def _recall_text(entry: dict) -> str:
+        """Indexed text of a turn; guide and crisis turns are kept out of recall"""
+        return entry['user'] if entry.get('ai_type') in ('juno', 'coach') else ''
+    
+    def _compact_memory(self):
+        """
+        Fold the oldest turns of the working memory into the rolling summary
+
+        The summary is written on a background worker; the turns stay in the
+        working memory (and the prompt) until a later turn swaps them for it.
+        """
+        if self._summary_job is not None:
+            self._apply_summary()
+            if self._summary_job is not None:
+                return
+        if len(self.memory) > self.MEMORY_WINDOW:
+            oldest = self.memory[:self.SUMMARY_CHUNK]
+            worker = get_background_worker('juno-summary', self.SUMMARY_WORKERS)
+            self._summary_job = (worker.submit(self._summarize_turns, self.summary, oldest), oldest)
+    
+    def _apply_summary(self, timeout: float = 0):
+        """Swap summarised turns for the new summary once the job is done (waiting up to timeout)"""
+        future, turns = self._summary_job
+        wait([future], timeout=timeout)
+        if not future.done():
+            return
+        self._summary_job = None
+        try:
+            self.summary = future.result()
+        except Exception:
+            return
+        # The turns are still at the front unless the memory was reloaded meanwhile
+        if len(self.memory) >= len(turns) and all(a is b for a, b in zip(self.memory, turns)):
+            del self.memory[:len(turns)]
+        if self.memory_log is not None:
+            self.memory_log.append('summary', self.summary)
+    
+    def _flush_summary(self):
+        """Wait (up to SUMMARY_TIMEOUT) for a summary still being written, so it is persisted"""
+        if self._summary_job is not None:
+            self._apply_summary(self.SUMMARY_TIMEOUT)
+    
+    def _summarize_turns(self, summary: str, turns: list) -> str:
+        """Merge turns into a rolling summary (extractive fallback if the API fails)"""
+        transcript = "\n".join(f"User: {m['user']}\nAssistant: {m['assistant']}" for m in turns)
+        try:
+            with tracing.span('summary') as span:
+                response = self.client.chat.completions.create(
+                    model='gpt-4o-mini',
+                    messages=[
+                        {'role': 'system', 'content': (
+                            "Update the running summary of a user's wellness conversations. Keep names, "
+                            "struggles, goals, faith context and progress. Under 120 words."
+                        )},
+                        {'role': 'user', 'content': f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+                    ],
+                    max_tokens=200,
+                    temperature=0.3,
+                    timeout=self.SUMMARY_TIMEOUT
+                )
+                tracing.record_usage(span, response)
+            summary = response.choices[0].message.content.strip()
+        except Exception as e:
+            print(f"❌ Summary Error: {e}")
+            topics = '; '.join(m['user'][:60] for m in turns)
+            summary = f"{summary} {topics}".strip()
+        return summary[-self.SUMMARY_MAX_CHARS:]
+    
+    def _error(self, msg: str, lang: str, deadline: Deadline) -> dict:
         """Error response"""
-        audio = self.voice.text_to_speech(msg, lang, 'female')
-        return {'type': 'error', 'reply': msg, 'audio': audio, 'lang': lang}
+        audio = self._speak(msg, lang, 'female', deadline)
+        return {'type': 'error', 'reply': msg, 'audio': audio, 'lang': lang, 'degraded': deadline.degraded}
+    
+    def save_memory(self, filepath: str = 'juno_memory.jsonl'):
+        """
+        Persist memory to an append-only log
+
+        Turns are appended as they happen once a log is attached, so this only
+        writes the current context record (plus a one-time backfill when the
+        log is new). A legacy .json path is redirected to the .jsonl log next
+        to it, which is where load_memory migrates that snapshot to.
+        """
+        self._flush_summary()
+        filepath = self._log_path(filepath)
+        if self.memory_log is None or self.memory_log.filepath != filepath:
+            self._attach_memory_log(filepath)
+        self.memory_log.append('context', self.context)
+        print(f"✅ Saved {len(self.memory_log)} conversations to {filepath}")
     
-    def save_memory(self, filepath: str = 'juno_memory.json'):
-        """Save memory to file"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump({'memory': self.memory, 'context': self.context}, f, indent=2)
-        print(f"✅ Saved {len(self.memory)} conversations to {filepath}")
+    def load_memory(self, filepath: str = 'juno_memory.jsonl'):
+        """Load memory from an append-only log (or a legacy .json snapshot)"""
+        if filepath.endswith('.json'):
+            self._load_legacy_memory(filepath)
+        else:
+            self._load_log(filepath)
+
+    def _load_log(self, filepath: str):
+        """Replace memory with the contents of the log at filepath"""
+        if not os.path.exists(filepath):
+            print(f"ℹNo memory file found at {filepath}")
+            return
+
+        if self.memory_log is not None:
+            self.memory_log.close()
+        self.memory_log = MemoryLog(filepath)
+        self._memory_index = None
+        self._index_job = None
+        self._summary_job = None
+        self.memory = self.memory_log.read_turns(-self.MEMORY_WINDOW)
+        self.summary = self.memory_log.latest('summary') or ''
+        self.turn_count = len(self.memory_log)
+        self.context = self.memory_log.latest('context') or {'greeted': False, 'spiritual_tier': 1}
+        self._rebuild_stats()
+        # Start indexing the history now so recall is ready a few turns in
+        self._get_memory_index()
+        print(f"Loaded {self.turn_count} conversations from {filepath}")
     
-    def load_memory(self, filepath: str = 'juno_memory.json'):
-        """Load memory from file"""
+    def open_memory(self, filepath: str):
+        """Resume from a memory log if it exists, otherwise start a new one there"""
+        if os.path.exists(filepath):
+            self.load_memory(filepath)
+        else:
+            self._attach_memory_log(self._log_path(filepath))
+    
+    def close_memory(self):
+        """Flush and close the memory log"""
+        self._flush_summary()
+        if self.memory_log is not None:
+            self.memory_log.close()
+            self.memory_log = None
+            self._memory_index = None
+            self._index_job = None
+    
+    def _attach_memory_log(self, filepath: str):
+        """Switch to a memory log, backfilling it when it is new"""
+        if self.memory_log is not None:
+            self.memory_log.close()
+        self.memory_log = MemoryLog(filepath)
+        self._memory_index = None
+        self._index_job = None
+        if len(self.memory_log) == 0:
+            for entry in self.memory:
+                self.memory_log.append_turn(entry)
+            if self.summary:
+                self.memory_log.append('summary', self.summary)
+    
+    @staticmethod
+    def _log_path(filepath: str) -> str:
+        """Memory logs never use the legacy .json name (x.json -> x.jsonl)"""
+        return filepath + 'l' if filepath.endswith('.json') else filepath
+
+    def _load_legacy_memory(self, filepath: str):
+        """Migrate a full-snapshot JSON memory file written by older versions to a log"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                self.memory = data.get('memory', [])
-                self.context = data.get('context', {'greeted': False, 'spiritual_tier': 1})
-            print(f"Loaded {len(self.memory)} conversations from {filepath}")
         except FileNotFoundError:
-            print(f"ℹNo memory file found at {filepath}")
+            # Nothing to migrate, but a log may already live next to it
+            self._load_log(self._log_path(filepath))
+            return
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict) or 'type' in data:
+            # Already a log (saved under a .json name before saves were redirected)
+            self._load_log(filepath)
+            return
+
+        log_path = filepath + 'l'
+        if not os.path.exists(log_path):
+            log = MemoryLog(log_path)
+            for entry in data.get('memory', []):
+                log.append_turn(entry)
+            log.append('context', data.get('context', {'greeted': False, 'spiritual_tier': 1}))
+            log.close()
+            print(f"Migrated {filepath} to {log_path}")
+        self._load_log(log_path)
     
     def get_stats(self) -> dict:
-        """Get memory statistics"""
-        moods = [m['sentiment']['mood'] for m in self.memory if 'sentiment' in m]
-        
+        """Get memory statistics (O(1): counters are maintained by _save_memory)"""
         return {
-            'total_conversations': len(self.memory),
-            'moods': moods,
+            'total_conversations': self.turn_count,
+            'moods': list(self.recent_moods),
             'mood_distribution': {
-                'happy': moods.count('happy'),
-                'calm': moods.count('calm'),
-                'neutral': moods.count('neutral'),
-                'sad': moods.count('sad'),
-                'anxious': moods.count('anxious'),
-                'crisis': moods.count('crisis')
+                mood: self.mood_counts[mood]
+                for mood in ('happy', 'calm', 'neutral', 'sad', 'anxious', 'crisis')
             },
-            'languages': list(set(m['lang'] for m in self.memory)),
-            'ai_types': list(set(m['ai_type'] for m in self.memory)),
+            'languages': list(self.languages),
+            'ai_types': list(self.ai_types),
             'current_spiritual_tier': self.context.get('spiritual_tier', 1)
-        }
\ No newline at end of file
+        }
+    
+    def estimate_memory_bytes(self) -> int:
+        """Rough RAM footprint of this session's working memory"""
+        size = 2048 + len(self.summary)
+        for m in self.memory:
+            size += 512 + len(m['user']) + len(m['assistant'])
+        if self._memory_index is not None:
+            size += self._memory_index.nbytes
+        return size
+    
+    def verify_stats(self) -> bool:
+        """
+        Check the incremental counters against a full rescan
+
+        Rescans the memory log when one is attached, otherwise the working
+        memory (which only covers every turn if nothing was summarized yet).
+        """
+        entries = self.memory_log.iter_turns() if self.memory_log is not None else self.memory
+        scanned = self._scan_stats(entries)
+        return scanned == {
+            'total': self.turn_count,
+            'moods': +self.mood_counts,
+            'languages': self.languages,
+            'ai_types': self.ai_types
+        }
+    
+    def _reset_stats(self):
+        """Clear the incremental statistics"""
+        self.mood_counts = Counter()
+        self.recent_moods = deque(maxlen=self.RECENT_MOODS)
+        self.languages = set()
+        self.ai_types = set()
+    
+    def _update_stats(self, entry: dict):
+        """Fold one stored turn into the statistics"""
+        if 'sentiment' in entry:
+            self.mood_counts[entry['sentiment']['mood']] += 1
+            self.recent_moods.append(entry['sentiment']['mood'])
+        self.languages.add(entry['lang'])
+        self.ai_types.add(entry['ai_type'])
+    
+    def _rebuild_stats(self):
+        """Recompute statistics from the memory log (or working memory)"""
+        self._reset_stats()
+        entries = self.memory_log.iter_turns() if self.memory_log is not None else self.memory
+        for entry in entries:
+            self._update_stats(entry)
+    
+    @staticmethod
+    def _scan_stats(entries) -> dict:
+        """Compute statistics with a full pass over entries"""
+        stats = {'total': 0, 'moods': Counter(), 'languages': set(), 'ai_types': set()}
+        for m in entries:
+            stats['total'] += 1
+            if 'sentiment' in m:
+                stats['moods'][m['sentiment']['mood']] += 1
+            stats['languages'].add(m['lang'])
+            stats['ai_types'].add(m['ai_type'])
+        return stats
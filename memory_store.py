@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from array import array
+from typing import Iterator, Optional
+
+
+class MemoryLog:
+    """Append-only JSONL log for conversation memory (one record per line)"""
+
+    # Record types where only the newest record matters; older ones are
+    # dropped when the log is compacted
+    SUPERSEDED_TYPES = ('context', 'summary', 'checkpoint')
+    COMPACT_THRESHOLD = 500
+
+    def __init__(self, filepath: str = 'juno_memory.jsonl'):
+        """
+        Open (or create) a memory log and index its records
+
+        Args:
+            filepath: Path of the JSONL log file
+        """
+        self.filepath = filepath
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._turn_offsets = array('q')
+        self._latest = {}
+        self._superseded = 0
+        self._compactor = None
+
+        if os.path.exists(filepath):
+            self._scan()
+        self._file = open(filepath, 'ab')
+
+    def __len__(self) -> int:
+        return len(self._turn_offsets)
+
+    def append_turn(self, entry: dict) -> int:
+        """
+        Append a single conversation turn
+
+        Returns:
+            int: Sequence number of the stored turn
+        """
+        with self._lock:
+            offset = self._write('turn', entry)
+            self._turn_offsets.append(offset)
+            return len(self._turn_offsets) - 1
+
+    def append(self, kind: str, data) -> None:
+        """Append a non-turn record (e.g. 'context' or 'summary')"""
+        with self._lock:
+            offset = self._write(kind, data)
+            if kind in self._latest:
+                self._superseded += 1
+            self._latest[kind] = offset
+            needs_compaction = self._superseded >= self.COMPACT_THRESHOLD
+
+        if needs_compaction:
+            self.compact_in_background()
+
+    def latest(self, kind: str):
+        """Get the newest record of a given type, or None"""
+        with self._lock:
+            offset = self._latest.get(kind)
+            if offset is None:
+                return None
+            return self._read_at(offset)['data']
+
+    def read_turn(self, seq: int) -> dict:
+        """Read a single turn by sequence number"""
+        with self._lock:
+            return self._read_at(self._turn_offsets[seq])['data']
+
+    def read_turns(self, start: int = 0, stop: Optional[int] = None) -> list:
+        """
+        Read a page of turns
+
+        Args:
+            start: First sequence number (negative values count from the end)
+            stop: Sequence number to stop before (None = end of log)
+
+        Returns:
+            list: Turn dicts in chronological order
+        """
+        with self._lock:
+            offsets = self._turn_offsets[start:stop]
+            if not offsets:
+                return []
+            self._file.flush()
+            turns = []
+            with open(self.filepath, 'rb') as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    turns.append(json.loads(f.readline())['data'])
+            return turns
+
+    def iter_turns(self, page_size: int = 500) -> Iterator[dict]:
+        """Stream all turns page by page without loading the whole log"""
+        start = 0
+        while True:
+            page = self.read_turns(start, start + page_size)
+            if not page:
+                return
+            yield from page
+            start += len(page)
+
+    def compact(self):
+        """Rewrite the log without superseded records"""
+        with self._compact_lock:
+            self._compact()
+
+    def _compact(self):
+        """Two-pass rewrite: bulk copy unlocked, then move the tail and swap files"""
+        with self._lock:
+            self._file.flush()
+            stop = self._file.tell()
+            latest = dict(self._latest)
+
+        tmp_path = self.filepath + '.compact'
+        turn_offsets = array('q')
+        new_latest = {}
+
+        with open(self.filepath, 'rb') as src, open(tmp_path, 'wb') as dst:
+            self._copy_records(src, dst, 0, stop, latest, turn_offsets, new_latest)
+
+            # Records appended while the bulk copy ran are moved under the lock
+            with self._lock:
+                self._file.flush()
+                end = self._file.tell()
+                self._copy_records(src, dst, stop, end, self._latest, turn_offsets, new_latest)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+                self._file.close()
+                os.replace(tmp_path, self.filepath)
+                self._file = open(self.filepath, 'ab')
+                self._turn_offsets = turn_offsets
+                self._latest = new_latest
+                self._superseded = 0
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start compaction on a daemon thread unless one is already running"""
+        with self._lock:
+            if self._compactor and self._compactor.is_alive():
+                return self._compactor
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+            return self._compactor
+
+    def close(self):
+        """Wait for compaction and close the log"""
+        compactor = self._compactor
+        if compactor and compactor.is_alive():
+            compactor.join()
+        with self._lock:
+            self._file.close()
+
+    def _write(self, kind: str, data) -> int:
+        """Write one record and return its byte offset (caller holds the lock)"""
+        line = json.dumps({'type': kind, 'data': data}, ensure_ascii=False) + '\n'
+        offset = self._file.tell()
+        self._file.write(line.encode('utf-8'))
+        self._file.flush()
+        return offset
+
+    def _read_at(self, offset: int) -> dict:
+        """Read the record stored at a byte offset (caller holds the lock)"""
+        self._file.flush()
+        with open(self.filepath, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _scan(self):
+        """Index record offsets of an existing log without parsing turn bodies"""
+        with open(self.filepath, 'rb') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                kind = self._kind(line)
+                if kind == 'turn':
+                    self._turn_offsets.append(offset)
+                elif kind:
+                    if kind in self._latest:
+                        self._superseded += 1
+                    self._latest[kind] = offset
+                offset += len(line)
+
+        # Drop a partially written last record left behind by a crash
+        if offset < os.path.getsize(self.filepath):
+            with open(self.filepath, 'r+b') as f:
+                f.truncate(offset)
+
+    def _copy_records(self, src, dst, start: int, stop: int, latest: dict,
+                      turn_offsets: array, new_latest: dict):
+        """Copy records in [start, stop) to dst, dropping superseded ones"""
+        src.seek(start)
+        pos = start
+        while pos < stop:
+            line = src.readline()
+            if not line:
+                break
+            kind = self._kind(line)
+            if kind == 'turn':
+                turn_offsets.append(dst.tell())
+                dst.write(line)
+            elif kind and not (kind in self.SUPERSEDED_TYPES and latest.get(kind) != pos):
+                new_latest[kind] = dst.tell()
+                dst.write(line)
+            pos += len(line)
+
+    @staticmethod
+    def _kind(line: bytes) -> Optional[str]:
+        """Read the record type from the line prefix written by _write"""
+        prefix = b'{"type": "'
+        if not line.startswith(prefix):
+            return None
+        end = line.find(b'"', len(prefix))
+        return line[len(prefix):end].decode('utf-8') if end > 0 else None
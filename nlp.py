@@ -0,0 +1,37 @@
+import threading
+from typing import Tuple
+
+_lock = threading.Lock()
+_textblob = None
+
+
+def _get_textblob():
+    """Import TextBlob on first use (importing it pulls in nltk)"""
+    global _textblob
+    if _textblob is None:
+        with _lock:
+            if _textblob is None:
+                from textblob import TextBlob
+                _textblob = TextBlob
+    return _textblob
+
+
+def sentiment(text: str) -> Tuple[float, float]:
+    """
+    Analyze sentiment of a text
+
+    Returns:
+        tuple: (polarity -1..1, subjectivity 0..1)
+    """
+    result = _get_textblob()(text).sentiment
+    return result.polarity, result.subjectivity
+
+
+def polarity(text: str) -> float:
+    """Sentiment polarity of a text (-1..1)"""
+    return sentiment(text)[0]
+
+
+def warmup():
+    """Import TextBlob and load its sentiment lexicon before the first request"""
+    sentiment("warming up the sentiment lexicon")
@@ -1,5 +1,6 @@
 from textblob import TextBlob
 from typing import Dict, Tuple
+from crisis_detector import CrisisDetector
 
 class SentimentAnalyzer:
     """Emotion and mood detection from text"""
@@ -16,6 +17,7 @@ class SentimentAnalyzer:
             'suicide', 'kill myself', 'end it all', 'hurt myself',
             'self harm', 'cutting', 'die', 'worthless'
         ]
+        self.crisis_detector = CrisisDetector(self.crisis_keywords, word_boundaries=False)
     
     def analyze_sentiment(self, text: str) -> Dict[str, any]:
         """Analyze text sentiment and detect mood"""
@@ -44,5 +46,4 @@ class SentimentAnalyzer:
     
     def _detect_crisis(self, text: str) -> bool:
         """Detect crisis/self-harm keywords"""
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.crisis_keywords)
\ No newline at end of file
+        return self.crisis_detector.is_crisis(text)
\ No newline at end of file
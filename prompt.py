@@ -56,6 +56,13 @@ class Prompts:
         'hi': "मैं आपकी बात सुन रहा हूं और आपके बारे में चिंतित हूं। आप जो महसूस कर रहे हैं वह वास्तविक है, और आप परमेश्वर और मेरे लिए बहुत मायने रखते हैं। आप इस दर्द में अकेले नहीं हैं। कृपया तुरंत किसी भरोसेमंद से संपर्क करें - एक पादरी, परामर्शदाता, या विश्वसनीय वयस्क - या क्राइसिस हेल्पलाइन पर कॉल करें। परमेश्वर का हृदय आपके साथ टूटता है। क्या आप श्वास व्यायाम करना चाहेंगे?",
         'pt': "Eu ouço você e estou realmente preocupado. O que você está sentindo é real, e você é profundamente importante para Deus e para mim. Você não está sozinho nesta dor. Entre em contato imediatamente com alguém de confiança - um pastor, conselheiro ou adulto de confiança - ou ligue para uma linha de crise. O coração de Deus se parte com o seu. Gostaria de tentar um exercício de respiração?"
     }
+    
+    # Spoken when the AI reply does not arrive within the request deadline
+    FALLBACK = {
+        'en': "I'm here with you, and I'm listening. Could you tell me a little more about what's on your heart?",
+        'hi': "मैं आपके साथ हूं और आपकी बात सुन रहा हूं। क्या आप मुझे थोड़ा और बता सकते हैं कि आपके मन में क्या है?",
+        'pt': "Estou aqui com você e estou ouvindo. Você pode me contar um pouco mais sobre o que está no seu coração?"
+    }
    
     @classmethod
     def get(cls, ai_type: str, lang: str = 'en') -> str:
@@ -63,7 +70,7 @@ class Prompts:
         Get context-specific prompt by AI type and language
         
         Args:
-            ai_type: 'juno', 'coach', 'guide', or 'crisis'
+            ai_type: 'juno', 'coach', 'guide', 'crisis' or 'fallback'
             lang: 'en', 'hi', or 'pt'
         
         Returns:
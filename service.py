@@ -0,0 +1,338 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from background import get_background_worker
+from clients import warmup
+from coach_ai import CoachAI
+from deadline import TEXT_BUDGET, Deadline
+import tracing
+from history_store import HistoryStore, MemoryHistoryStore, SQLiteHistoryStore
+from journal_final import JournalAI, reply_stats
+from lazy_audio import LazyAudio
+from session_manager import SessionManager
+from theme_store import TrendStore
+
+app = FastAPI(title="VoiceMind API")
+
+# Blocking work (STT/LLM/TTS HTTP calls, TextBlob) runs on bounded pools so the
+# event loop only multiplexes sessions
+VOICE_WORKERS = int(os.getenv('VOICEMIND_VOICE_WORKERS', 16))
+TEXT_WORKERS = int(os.getenv('VOICEMIND_TEXT_WORKERS', 32))
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+# Journal replies skip the panel analysis; clients poll /journal/analysis for it
+JOURNAL_BACKGROUND_ANALYSIS = os.getenv('VOICEMIND_JOURNAL_BACKGROUND_ANALYSIS', '0') == '1'
+# Journal replies slower than JournalAI.REPLY_BUDGETS fall back to a default reply
+JOURNAL_SPECULATIVE = os.getenv('VOICEMIND_JOURNAL_SPECULATIVE', '0') == '1'
+# Coach history entries get their sentiment from a background job after the reply
+COACH_SENTIMENT = os.getenv('VOICEMIND_COACH_SENTIMENT', '1') == '1'
+# 'sqlite' keeps coach history across restarts; 'memory' keeps it in this process only
+COACH_HISTORY = os.getenv('VOICEMIND_COACH_HISTORY', 'sqlite')
+COACH_HISTORY_PATH = os.path.join('sessions', 'coach', 'history.db')
+# Trend points are appended to SQLite as sessions end (shared by every worker);
+# a trends.npz written by older versions is imported once into an empty store
+TRENDS_DB = os.path.join('sessions', 'journal', 'trends.db')
+TRENDS_PATH = os.path.join('sessions', 'journal', 'trends.npz')
+# Templated guide answers get their audio synthesized after startup, so the
+# fast path serves it instead of calling TTS inside the request ('' disables)
+GUIDE_AUDIO_LANGS = [l for l in os.getenv('VOICEMIND_GUIDE_AUDIO_LANGS', 'en').split(',') if l]
+AUDIO_CHUNK = 64 * 1024
+
+voice_executor = ThreadPoolExecutor(max_workers=VOICE_WORKERS, thread_name_prefix='voice')
+text_executor = ThreadPoolExecutor(max_workers=TEXT_WORKERS, thread_name_prefix='text')
+
+juno_sessions: Optional[SessionManager] = None
+coach_sessions: Optional[SessionManager] = None
+journal_sessions: Optional[SessionManager] = None
+# Coach text replies are spoken only when a client fetches their audio_url
+coach_audio: Optional[LazyAudio] = None
+coach_history: Optional[HistoryStore] = None
+trend_store: Optional[TrendStore] = None
+
+
+class AudioStore:
+    """Short-lived synthesized audio, fetched once by id and streamed to the client"""
+
+    def __init__(self, max_items: int = 1000, ttl: float = 300.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+
+    def put(self, audio: bytes) -> Optional[str]:
+        if not audio:
+            return None
+        self._expire()
+        audio_id = uuid.uuid4().hex
+        self._items[audio_id] = (time.monotonic(), audio)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return audio_id
+
+    def get(self, audio_id: str) -> Optional[bytes]:
+        self._expire()
+        item = self._items.get(audio_id)
+        return item[1] if item else None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._items:
+            audio_id, (created, _) = next(iter(self._items.items()))
+            if created >= cutoff:
+                break
+            self._items.popitem(last=False)
+
+
+audio_store = AudioStore()
+
+
+class JunoTextRequest(BaseModel):
+    user_id: str
+    text: str
+    lang: str = 'en'
+    context: str = 'juno'
+
+
+class CoachTextRequest(BaseModel):
+    user_id: str
+    text: str
+    lang: str = 'en'
+    gender: str = 'female'
+
+
+class JournalStartRequest(BaseModel):
+    user_id: str
+    language: str = 'en'
+
+
+class JournalTextRequest(BaseModel):
+    user_id: str
+    text: str
+    language: Optional[str] = None
+
+
+class JournalEndRequest(BaseModel):
+    user_id: str
+
+
+async def _run(executor: ThreadPoolExecutor, manager: SessionManager, user_id: str, method: str, *args,
+               timings: bool = False):
+    """Run a session method on a bounded executor (traced when timings are requested)"""
+    def call():
+        with tracing.trace(method, enabled=True if timings else None) as trace:
+            with manager.session(user_id) as session:
+                result = getattr(session, method)(*args)
+        if trace is not None:
+            result['timings'] = trace.timings()
+        return result
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+def _with_audio_url(result: dict, key: str) -> dict:
+    """Replace raw audio bytes in a response with a URL that streams them"""
+    audio_id = audio_store.put(result.pop(key, None))
+    result['audio_url'] = f"/audio/{audio_id}" if audio_id else None
+    return result
+
+
+def _stream_audio(audio: bytes) -> StreamingResponse:
+    def chunks():
+        for i in range(0, len(audio), AUDIO_CHUNK):
+            yield audio[i:i + AUDIO_CHUNK]
+
+    # ElevenLabs streams MP3 unless another output_format is requested
+    return StreamingResponse(chunks(), media_type="audio/mpeg")
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    audio = await file.read()
+    if not audio:
+        raise HTTPException(status_code=400, detail="Audio file cannot be empty")
+    if len(audio) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+    return audio
+
+
+def _journal_trends(user_id: str, days: float) -> dict:
+    result = trend_store.summary(user_id, days)
+    result['daily'] = trend_store.daily(user_id, days)
+    return result
+
+
+@app.on_event("startup")
+def startup():
+    global juno_sessions, coach_sessions, journal_sessions, coach_audio, coach_history, trend_store
+    juno_sessions = SessionManager(storage_dir='sessions/juno')
+    client, voice = juno_sessions.client, juno_sessions.voice
+    coach_audio = LazyAudio(voice)
+    coach_history = SQLiteHistoryStore(COACH_HISTORY_PATH) if COACH_HISTORY == 'sqlite' else MemoryHistoryStore()
+    coach_sessions = SessionManager(
+        storage_dir='sessions/coach',
+        factory=lambda user_id: CoachAI(client=client, voice=voice, prompts=juno_sessions.prompts,
+                                        sentiment=COACH_SENTIMENT, lazy_audio=coach_audio,
+                                        history=coach_history, user_id=user_id),
+        on_evict=lambda user_id, coach: coach.flush_sentiment(coach.SENTIMENT_FLUSH_TIMEOUT)
+    )
+
+    def create_journal(user_id: str) -> JournalAI:
+        journal = JournalAI(client=client, background_analysis=JOURNAL_BACKGROUND_ANALYSIS,
+                            speculative=JOURNAL_SPECULATIVE, trend_store=trend_store, user_id=user_id)
+        # Resume a session checkpointed by this or another worker
+        journal.open_checkpoint(journal_sessions.session_path(user_id))
+        return journal
+
+    journal_sessions = SessionManager(
+        storage_dir='sessions/journal',
+        factory=create_journal,
+        on_evict=lambda user_id, journal: journal.close_checkpoint()
+    )
+    trend_store = TrendStore(path=TRENDS_DB)
+    if os.path.exists(TRENDS_PATH) and not len(trend_store):
+        trend_store.load(TRENDS_PATH)
+    warmup(connections=os.getenv('VOICEMIND_WARMUP_CONNECTIONS', '1') != '0')
+    if GUIDE_AUDIO_LANGS:
+        get_background_worker().submit(juno_sessions.prerender_guide_audio, GUIDE_AUDIO_LANGS)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    for manager in (juno_sessions, coach_sessions, journal_sessions):
+        if manager:
+            manager.close_all()
+    if trend_store is not None:
+        trend_store.close()
+    if coach_history:
+        coach_history.close()
+    voice_executor.shutdown(wait=False)
+    text_executor.shutdown(wait=False)
+
+
+@app.get("/")
+def root():
+    return {"status": "VoiceMind API running"}
+
+
+@app.get("/stats")
+def stats():
+    return {
+        'juno': juno_sessions.stats(),
+        'coach': coach_sessions.stats(),
+        'journal': journal_sessions.stats(),
+        'guide_cache': juno_sessions.guide_cache.stats(),
+        'coach_audio': coach_audio.stats(),
+        'journal_replies': reply_stats.stats()
+    }
+
+
+@app.post("/juno/voice")
+async def juno_voice(user_id: str = Form(...), context: str = Form('juno'), file: UploadFile = File(...),
+                     timings: bool = False):
+    # The deadline starts before queueing so time spent waiting for a worker counts
+    deadline = Deadline.for_voice()
+    audio = await _read_upload(file)
+    result = await _run(voice_executor, juno_sessions, user_id, 'process_voice', audio, context, deadline,
+                        timings=timings)
+    return _with_audio_url(result, 'audio')
+
+
+@app.post("/juno/text")
+async def juno_text(req: JunoTextRequest, timings: bool = False):
+    result = await _run(text_executor, juno_sessions, req.user_id, 'process_text', req.text, req.lang, req.context,
+                        Deadline.for_text(), timings=timings)
+    return _with_audio_url(result, 'audio')
+
+
+@app.post("/coach/voice")
+async def coach_voice(user_id: str = Form(...), lang: str = Form('en'), gender: str = Form('female'),
+                      file: UploadFile = File(...), timings: bool = False):
+    deadline = Deadline.for_voice()
+    audio = await _read_upload(file)
+    result = await _run(voice_executor, coach_sessions, user_id, 'process_voice', audio, lang, gender, deadline,
+                        timings=timings)
+    return _with_audio_url(result, 'audio_reply')
+
+
+@app.post("/coach/text")
+async def coach_text(req: CoachTextRequest, timings: bool = False, inline_audio: bool = False):
+    # inline_audio: synthesize during the request instead of on the first audio_url fetch
+    deadline = Deadline.for_text() if inline_audio else Deadline(TEXT_BUDGET, stages=('llm',))
+    result = await _run(text_executor, coach_sessions, req.user_id, 'process_text', req.text, req.lang, req.gender,
+                        deadline, inline_audio, timings=timings)
+    if inline_audio:
+        result.pop('audio_id', None)
+        return _with_audio_url(result, 'audio_reply')
+    result.pop('audio_reply', None)
+    audio_id = result.pop('audio_id', None)
+    result['audio_url'] = f"/coach/audio/{audio_id}" if audio_id else None
+    return result
+
+
+@app.get("/coach/audio/{audio_id}")
+async def coach_audio_reply(audio_id: str):
+    audio = await asyncio.get_running_loop().run_in_executor(voice_executor, coach_audio.get, audio_id)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    if not audio:
+        raise HTTPException(status_code=502, detail="Speech synthesis failed")
+    return _stream_audio(audio)
+
+
+@app.get("/coach/history")
+async def coach_history_page(user_id: str, limit: int = 50, cursor: Optional[int] = None, lang: Optional[str] = None):
+    # Newest first; pass next_cursor back as cursor for the next (older) page
+    entries, next_cursor = await asyncio.get_running_loop().run_in_executor(
+        text_executor, coach_history.page, user_id, min(max(limit, 1), 200), cursor, lang)
+    return {'entries': entries, 'next_cursor': next_cursor}
+
+
+@app.post("/journal/start")
+async def journal_start(req: JournalStartRequest):
+    return await _run(text_executor, journal_sessions, req.user_id, 'start_chat', req.language)
+
+
+@app.post("/journal/text")
+async def journal_text(req: JournalTextRequest, timings: bool = False):
+    if not req.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    return await _run(text_executor, journal_sessions, req.user_id, 'process_text', req.text, req.language,
+                      Deadline(TEXT_BUDGET, stages=('llm',)), timings=timings)
+
+
+@app.get("/journal/analysis")
+async def journal_analysis(user_id: str, turn_id: int, wait: float = 0.0):
+    # wait: seconds to block for an analysis still being computed
+    return await _run(text_executor, journal_sessions, user_id, 'get_analysis', turn_id, min(max(wait, 0.0), 5.0))
+
+
+@app.get("/journal/trends")
+async def journal_trends(user_id: str, days: float = 30):
+    # Themes and mood across the user's past journal sessions
+    return await asyncio.get_running_loop().run_in_executor(text_executor, _journal_trends, user_id, days)
+
+
+@app.post("/journal/end")
+async def journal_end(req: JournalEndRequest):
+    result = await _run(text_executor, journal_sessions, req.user_id, 'end_session')
+    # Eviction may flush analysis and write a checkpoint, so keep it off the event loop
+    await asyncio.get_running_loop().run_in_executor(text_executor, journal_sessions.evict, req.user_id)
+    return result
+
+
+@app.get("/audio/{audio_id}")
+async def get_audio(audio_id: str):
+    audio = audio_store.get(audio_id)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    return _stream_audio(audio)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv('PORT', 8000)))
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from clients import get_config, get_openai_client, get_voice_engine
+from prompt import Prompts
+from juno_guide import JunoGuide
+from guide_cache import GuideCache
+from main import JunoAssistant
+
+
+class _Session:
+    """A hot session plus its bookkeeping"""
+
+    __slots__ = ('assistant', 'lock', 'in_use', 'size')
+
+    def __init__(self, assistant):
+        self.assistant = assistant
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.size = 0
+
+
+class SessionManager:
+    """Multi-user JunoAssistant sessions with shared clients and LRU eviction to disk"""
+
+    LOCK_STRIPES = 64
+
+    def __init__(self, storage_dir: str = 'sessions', max_sessions: Optional[int] = None,
+                 memory_budget_mb: Optional[float] = None,
+                 factory: Optional[Callable[[str], object]] = None,
+                 on_evict: Optional[Callable[[str, object], None]] = None,
+                 size_of: Optional[Callable[[object], int]] = None):
+        """
+        Args:
+            storage_dir: Directory holding one memory log per user
+            max_sessions: Cap on hot sessions (default: JUNO_MAX_SESSIONS or 200)
+            memory_budget_mb: RAM budget for hot sessions (default: JUNO_SESSION_BUDGET_MB or 256)
+            factory: Builds a session for a user id (default: JunoAssistant on shared clients)
+            on_evict: Persists a session before it is dropped (default: flush its memory log)
+            size_of: Estimates a session's RAM footprint in bytes
+        """
+        get_config()
+        self.storage_dir = storage_dir
+        self.max_sessions = max_sessions or int(os.getenv('JUNO_MAX_SESSIONS', 200))
+        budget_mb = memory_budget_mb or float(os.getenv('JUNO_SESSION_BUDGET_MB', 256))
+        self.memory_budget = int(budget_mb * 1024 * 1024)
+
+        self.factory = factory or self._create_juno_session
+        self.on_evict = on_evict or self._persist_juno_session
+        self.size_of = size_of or self._juno_session_size
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._user_locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._total_size = 0
+        self.evictions = 0
+
+        if factory is None:
+            self._build_shared_clients()
+        os.makedirs(storage_dir, exist_ok=True)
+
+    @contextmanager
+    def session(self, user_id: str):
+        """
+        Use a user's session exclusively (one request per user at a time)
+
+        Usage:
+            with manager.session(user_id) as assistant:
+                assistant.process_voice(audio)
+        """
+        entry = self._acquire(user_id)
+        try:
+            with entry.lock:
+                yield entry.assistant
+        finally:
+            self._release(user_id, entry)
+
+    def evict(self, user_id: str) -> bool:
+        """Persist and drop a session if it is idle"""
+        with self._user_lock(user_id):
+            with self._lock:
+                entry = self._sessions.get(user_id)
+                if entry is None or entry.in_use:
+                    return False
+                del self._sessions[user_id]
+                self._total_size -= entry.size
+                self.evictions += 1
+            self.on_evict(user_id, entry.assistant)
+        return True
+
+    def close_all(self):
+        """Persist every hot session (e.g. on shutdown)"""
+        for user_id in list(self._sessions):
+            self.evict(user_id)
+
+    def stats(self) -> dict:
+        """Get session manager statistics"""
+        with self._lock:
+            return {
+                'hot_sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'memory_bytes': self._total_size,
+                'memory_budget_bytes': self.memory_budget,
+                'evictions': self.evictions
+            }
+
+    def session_path(self, user_id: str) -> str:
+        """Memory log path for a user id"""
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', user_id)[:64]
+        digest = hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.storage_dir, f"{safe}-{digest}.jsonl")
+
+    def _acquire(self, user_id: str) -> _Session:
+        """Get (or load) a session, mark it in use and move it to the MRU end"""
+        with self._lock:
+            entry = self._sessions.get(user_id)
+            if entry is not None:
+                self._sessions.move_to_end(user_id)
+                entry.in_use += 1
+                return entry
+
+        # Load outside the manager lock; the per-user stripe stops two threads
+        # (or a concurrent eviction) from opening the same memory log
+        with self._user_lock(user_id):
+            with self._lock:
+                entry = self._sessions.get(user_id)
+                if entry is not None:
+                    self._sessions.move_to_end(user_id)
+                    entry.in_use += 1
+                    return entry
+
+            assistant = self.factory(user_id)
+            with self._lock:
+                entry = _Session(assistant)
+                entry.size = self.size_of(assistant)
+                entry.in_use = 1
+                self._sessions[user_id] = entry
+                self._total_size += entry.size
+
+        self._enforce_limits()
+        return entry
+
+    def _release(self, user_id: str, entry: _Session):
+        """Mark a session idle, refresh its size and evict over budget"""
+        with self._lock:
+            entry.in_use -= 1
+            size = self.size_of(entry.assistant)
+            if self._sessions.get(user_id) is entry:
+                self._total_size += size - entry.size
+            entry.size = size
+        self._enforce_limits()
+
+    def _enforce_limits(self):
+        """Evict idle least-recently-used sessions until under both limits"""
+        while True:
+            with self._lock:
+                over = (len(self._sessions) > self.max_sessions
+                        or self._total_size > self.memory_budget)
+                victim = next((uid for uid, e in self._sessions.items() if not e.in_use), None)
+            if not over or victim is None:
+                return
+            self.evict(victim)
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        """Striped lock serializing load/evict of the same user"""
+        return self._user_locks[hash(user_id) % self.LOCK_STRIPES]
+
+    def _build_shared_clients(self):
+        """Create the heavy clients once for every JunoAssistant session"""
+        self.client = get_openai_client()
+        self.voice = get_voice_engine()
+        self.prompts = Prompts()
+        self.juno_guide = JunoGuide()
+        self.guide_cache = GuideCache(self.juno_guide.GUIDES)
+
+    def prerender_guide_audio(self, langs=('en',)):
+        """Fill the shared GuideCache with audio for every templated guide answer"""
+        assistant = JunoAssistant(client=self.client, voice=self.voice, prompts=self.prompts,
+                                  juno_guide=self.juno_guide, guide_cache=self.guide_cache)
+        for lang in langs:
+            assistant.prerender_guide_audio(lang)
+        print(f"✅ Pre-rendered guide audio for {', '.join(langs)}")
+
+    def _create_juno_session(self, user_id: str) -> JunoAssistant:
+        assistant = JunoAssistant(client=self.client, voice=self.voice,
+                                  prompts=self.prompts, juno_guide=self.juno_guide,
+                                  guide_cache=self.guide_cache)
+        assistant.open_memory(self.session_path(user_id))
+        return assistant
+
+    def _persist_juno_session(self, user_id: str, assistant: JunoAssistant):
+        assistant.save_memory(self.session_path(user_id))
+        assistant.close_memory()
+
+    @staticmethod
+    def _juno_session_size(assistant) -> int:
+        estimate = getattr(assistant, 'estimate_memory_bytes', None)
+        return estimate() if estimate else 64 * 1024
@@ -0,0 +1,179 @@
+import math
+import re
+import zlib
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset({
+    'a', 'an', 'the', 'i', 'me', 'my', 'you', 'your', 'is', 'are', 'am', 'be', 'to', 'of',
+    'in', 'on', 'at', 'for', 'and', 'or', 'it', 'this', 'that', 'do', 'does', 'can', 'please'
+})
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(_TOKEN_RE.findall(text.lower()))
+
+
+class HashingVectorizer:
+    """Stateless text → sparse vector using hashed word and character n-grams"""
+
+    def __init__(self, n_features: int = 1 << 20, char_ngram: int = 3):
+        """
+        Args:
+            n_features: Hash space size
+            char_ngram: Character n-gram length (0 = words and bigrams only)
+        """
+        self.n_features = n_features
+        self.char_ngram = char_ngram
+
+    def features(self, text: str) -> Dict[int, float]:
+        """Hashed term counts (crc32, so ids are stable across processes)"""
+        counts = {}
+        words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+        terms = list(words)
+        terms += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        n = self.char_ngram
+        if n:
+            for w in words:
+                padded = f"#{w}#"
+                terms += [f"#{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+
+        for term in terms:
+            h = zlib.crc32(term.encode('utf-8')) % self.n_features
+            counts[h] = counts.get(h, 0.0) + 1.0
+        return counts
+
+
+class VectorIndex:
+    """Incremental cosine-similarity index backed by an inverted index of hashed features"""
+
+    # max_df pruning only kicks in once the index is this large
+    MIN_DOCS_FOR_PRUNING = 100
+
+    def __init__(self, vectorizer: Optional[HashingVectorizer] = None, idf: bool = False,
+                 max_df: float = 1.0, max_postings: Optional[int] = None):
+        """
+        Args:
+            vectorizer: Feature extractor (default: HashingVectorizer())
+            idf: Weight query features by inverse document frequency (TF-IDF scoring)
+            max_df: Ignore query features found in more than this fraction of documents
+            max_postings: Only score the newest documents of each posting list, which
+                bounds search cost regardless of index size
+        """
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.idf = idf
+        self.max_df = max_df
+        self.max_postings = max_postings
+        self._postings = {}
+        self._deleted = set()
+        self._size = 0
+        self._n_postings = 0
+
+    def __len__(self) -> int:
+        return self._size - len(self._deleted)
+
+    def add(self, text: str) -> int:
+        """
+        Index a document
+
+        Returns:
+            int: Document id (consecutive, starting at 0)
+        """
+        doc_id = self._size
+        self._size += 1
+        for feature, weight in self._normalize(self.vectorizer.features(text)).items():
+            posting = self._postings.get(feature)
+            if posting is None:
+                posting = self._postings[feature] = (array('i'), array('f'))
+            posting[0].append(doc_id)
+            posting[1].append(weight)
+            self._n_postings += 1
+        return doc_id
+
+    def remove(self, doc_id: int):
+        """Hide a document from future searches"""
+        self._deleted.add(doc_id)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True once removed documents outnumber live ones"""
+        return len(self._deleted) > len(self)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate RAM used by the posting lists"""
+        return self._n_postings * 8 + len(self._postings) * 200
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Find the most similar documents
+
+        Only postings of the query's features are touched, so cost depends on
+        how many documents share terms with the query, not on index size.
+
+        Returns:
+            list: (doc_id, cosine score) pairs, best first
+        """
+        import numpy as np
+
+        ids, weights = self._gather(self._query(text))
+        if ids is None:
+            return []
+
+        doc_ids, inverse = np.unique(ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        if self._deleted:
+            live = ~np.isin(doc_ids, np.fromiter(self._deleted, dtype=np.int64))
+            doc_ids, scores = doc_ids[live], scores[live]
+
+        keep = scores >= min_score
+        doc_ids, scores = doc_ids[keep], scores[keep]
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            doc_ids, scores = doc_ids[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(int(doc_ids[i]), float(scores[i])) for i in order]
+
+    def _gather(self, query: Dict[int, float]):
+        """Concatenate the postings of the query features, weighted by the query"""
+        import numpy as np
+
+        id_parts, weight_parts = [], []
+        for feature, q in query.items():
+            posting = self._postings.get(feature)
+            if posting is None:
+                continue
+            ids = np.frombuffer(posting[0], dtype=np.int32)
+            weights = np.frombuffer(posting[1], dtype=np.float32)
+            if self.max_postings and len(ids) > self.max_postings:
+                ids, weights = ids[-self.max_postings:], weights[-self.max_postings:]
+            id_parts.append(ids)
+            weight_parts.append(weights * q)
+        if not id_parts:
+            return None, None
+        return np.concatenate(id_parts), np.concatenate(weight_parts)
+
+    def _query(self, text: str) -> Dict[int, float]:
+        """Query vector, IDF-weighted and pruned of overly common features when configured"""
+        features = self.vectorizer.features(text)
+        if not (self.idf or self.max_df < 1.0):
+            return self._normalize(features)
+
+        n_docs = max(len(self), 1)
+        prune = self.max_df < 1.0 and n_docs >= self.MIN_DOCS_FOR_PRUNING
+        query = {}
+        for feature, tf in features.items():
+            posting = self._postings.get(feature)
+            df = len(posting[0]) if posting is not None else 0
+            if prune and df > self.max_df * n_docs:
+                continue
+            query[feature] = tf * (math.log((n_docs + 1) / (df + 1)) + 1.0) if self.idf else tf
+        return self._normalize(query)
+
+    @staticmethod
+    def _normalize(features: Dict[int, float]) -> Dict[int, float]:
+        norm = sum(v * v for v in features.values()) ** 0.5
+        return {f: v / norm for f, v in features.items()} if norm else {}
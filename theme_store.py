@@ -0,0 +1,322 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Journal themes and their trigger phrases (substring match on lowercased text).
+# Order matters: theme i is bit i of a themes bitmask, so only append.
+THEMES = {
+    'loneliness': ['alone', 'lonely', 'isolated', 'no one', 'by myself'],
+    'loss/grief': ['lost', 'missing', 'miss', 'gone', 'breakup', 'break up'],
+    'overwhelm': ['overwhelm', 'too much', 'can\'t handle', 'drowning', 'exhausted'],
+    'uncertainty': ['don\'t know', 'confused', 'unsure', 'lost'],
+    'self-worth': ['worthless', 'not good enough', 'failure', 'stupid']
+}
+
+DAY = 86400.0
+
+
+class ThemeMatcher:
+    """
+    All theme phrases compiled into one pattern
+
+    Gives exactly the themes of checking each phrase with `in`: the scan
+    restarts one character after every match so overlapping phrases are
+    seen, and a phrase's mask includes every phrase it contains (those
+    match at the same place).
+    """
+
+    def __init__(self, themes: Optional[Dict[str, List[str]]] = None):
+        self.themes = list((themes or THEMES).keys())
+        self._masks = {}
+        for bit, (theme, phrases) in enumerate((themes or THEMES).items()):
+            for phrase in phrases:
+                self._masks[phrase.lower()] = self._masks.get(phrase.lower(), 0) | (1 << bit)
+        for phrase in self._masks:
+            for inner in self._masks:
+                if inner != phrase and inner in phrase:
+                    self._masks[phrase] |= self._masks[inner]
+        self._pattern = re.compile('|'.join(re.escape(p) for p in sorted(self._masks, key=len, reverse=True)))
+        self._full = (1 << len(self.themes)) - 1
+
+    def mask(self, text: str) -> int:
+        """Bitmask of the themes mentioned in text"""
+        text = text.lower()
+        search = self._pattern.search
+        found, m = 0, search(text)
+        while m is not None:
+            found |= self._masks[m.group()]
+            if found == self._full:
+                break
+            m = search(text, m.start() + 1)
+        return found
+
+    def match(self, text: str) -> List[str]:
+        """Themes mentioned in text, in THEMES order"""
+        return self.names(self.mask(text))
+
+    def names(self, mask: int) -> List[str]:
+        return [t for bit, t in enumerate(self.themes) if mask >> bit & 1]
+
+    def mask_of(self, themes: Iterable[str]) -> int:
+        """Bitmask for theme names (unknown names are ignored)"""
+        found = 0
+        for theme in themes:
+            if theme in self.themes:
+                found |= 1 << self.themes.index(theme)
+        return found
+
+
+class _Series:
+    """Growable columns for one user (capacity doubles as points are added)"""
+
+    __slots__ = ('ts', 'polarity', 'mask', 'size', 'sorted')
+
+    def __init__(self, capacity: int = 16):
+        import numpy as np
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.polarity = np.empty(capacity, dtype=np.float32)
+        self.mask = np.empty(capacity, dtype=np.uint32)
+        self.size = 0
+        self.sorted = True
+
+    def append(self, ts: float, polarity: float, mask: int):
+        import numpy as np
+        if self.size == len(self.ts):
+            capacity = len(self.ts) * 2
+            for name in ('ts', 'polarity', 'mask'):
+                column = getattr(self, name)
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                setattr(self, name, grown)
+        if self.size and ts < self.ts[self.size - 1]:
+            self.sorted = False
+        self.ts[self.size] = ts
+        self.polarity[self.size] = polarity
+        self.mask[self.size] = mask
+        self.size += 1
+
+    def window(self, since: Optional[float], until: Optional[float]):
+        """(ts, polarity, mask) views for since <= ts < until"""
+        import numpy as np
+        if not self.sorted:
+            order = np.argsort(self.ts[:self.size], kind='stable')
+            for name in ('ts', 'polarity', 'mask'):
+                column = getattr(self, name)
+                column[:self.size] = column[:self.size][order]
+            self.sorted = True
+        ts = self.ts[:self.size]
+        lo = 0 if since is None else int(np.searchsorted(ts, since, side='left'))
+        hi = self.size if until is None else int(np.searchsorted(ts, until, side='left'))
+        return ts[lo:hi], self.polarity[lo:hi], self.mask[lo:hi]
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.polarity.nbytes + self.mask.nbytes
+
+
+class TrendStore:
+    """
+    Per-user time series of journal sessions: (timestamp, polarity, themes bitmask)
+
+    16 bytes per point (float64 time, float32 polarity, uint32 themes) in
+    NumPy columns, so range queries are a binary search plus vectorized
+    reductions.
+
+    With a path, every point is also appended to a SQLite table as it is
+    added, and each query first pulls the rows other processes appended
+    since, so nothing is lost on a crash and several workers share one
+    series per user.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS trends (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            ts REAL NOT NULL,
+            polarity REAL NOT NULL,
+            mask INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, matcher: Optional[ThemeMatcher] = None, path: Optional[str] = None):
+        """
+        Args:
+            matcher: ThemeMatcher whose theme order defines the bitmask
+            path: SQLite file the points are appended to (None = in memory only)
+        """
+        self.matcher = matcher or ThemeMatcher()
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self._synced = 0
+        if path:
+            self._open(path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return sum(s.size for s in self._series.values())
+
+    def add(self, user_id: str, polarity: float, themes: Iterable[str] = (), ts: Optional[float] = None):
+        """Record one session (themes by name; ts defaults to now)"""
+        self.add_mask(user_id, polarity, self.matcher.mask_of(themes), ts)
+
+    def add_mask(self, user_id: str, polarity: float, mask: int, ts: Optional[float] = None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            if self._db is None:
+                self._append(user_id, ts, polarity, mask)
+                return
+            with self._db:
+                self._db.execute('INSERT INTO trends (user_id, ts, polarity, mask) VALUES (?, ?, ?, ?)',
+                                 (user_id, ts, float(polarity), int(mask)))
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def theme_counts(self, user_id: str, days: Optional[float] = 30, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Sessions mentioning each theme in the last `days` days (None = all time)
+
+        Returns:
+            dict: {theme: sessions}, most frequent first, themes never seen omitted
+        """
+        import numpy as np
+        with self._lock:
+            window = self._window(user_id, days, now)
+            if window is None:
+                return {}
+            masks = window[2]
+            bits = np.arange(len(self.matcher.themes), dtype=np.uint32)
+            counts = ((masks[:, None] >> bits) & 1).sum(axis=0)
+        pairs = [(t, int(c)) for t, c in zip(self.matcher.themes, counts) if c]
+        return dict(sorted(pairs, key=lambda p: -p[1]))
+
+    def daily(self, user_id: str, days: float = 30, now: Optional[float] = None) -> List[dict]:
+        """
+        Sessions and mean polarity per day for the last `days` days (days without sessions omitted)
+
+        Returns:
+            list: [{'day': start-of-day timestamp (UTC), 'sessions', 'polarity'}]
+        """
+        import numpy as np
+        with self._lock:
+            window = self._window(user_id, days, now)
+            if window is None:
+                return []
+            ts, polarity, _ = window
+            day = (ts // DAY).astype(np.int64)
+            first = int(day[0]) if len(day) else 0
+            counts = np.bincount(day - first)
+            sums = np.bincount(day - first, weights=polarity)
+        return [{'day': (first + i) * DAY, 'sessions': int(n), 'polarity': round(float(sums[i] / n), 3)}
+                for i, n in enumerate(counts) if n]
+
+    def summary(self, user_id: str, days: float = 30, now: Optional[float] = None) -> dict:
+        """Theme counts, session count and mean polarity over the last `days` days"""
+        with self._lock:
+            window = self._window(user_id, days, now)
+            sessions = 0 if window is None else len(window[0])
+            polarity = float(window[1].mean()) if sessions else 0.0
+        return {'days': days, 'sessions': sessions, 'average_polarity': round(polarity, 3),
+                'themes': self.theme_counts(user_id, days, now)}
+
+    def nbytes(self) -> int:
+        return sum(s.nbytes for s in self._series.values())
+
+    def save(self, path: str):
+        """Write every series to one .npz file"""
+        import numpy as np
+        with self._lock:
+            self._sync()
+            users = list(self._series)
+            columns = [s.window(None, None) for s in self._series.values()]
+            sizes = np.array([len(c[0]) for c in columns], dtype=np.int64)
+            empty = (np.empty(0, np.float64), np.empty(0, np.float32), np.empty(0, np.uint32))
+            ts, polarity, mask = (np.concatenate([c[i] for c in columns]) if columns else empty[i] for i in range(3))
+            with open(path, 'wb') as f:
+                np.savez_compressed(f, users=np.array(users, dtype=str), sizes=sizes, ts=ts, polarity=polarity,
+                                    mask=mask, themes=np.array(self.matcher.themes, dtype=str))
+
+    def load(self, path: str):
+        """Replace the store's contents with a file written by save()"""
+        import numpy as np
+        data = np.load(path)
+        if list(data['themes']) != self.matcher.themes[:len(data['themes'])]:
+            raise ValueError("theme order in the trend file does not match THEMES")
+        if self._db is not None:
+            users = np.repeat(data['users'], data['sizes'])
+            rows = [(str(u), float(t), float(p), int(m))
+                    for u, t, p, m in zip(users, data['ts'], data['polarity'], data['mask'])]
+            with self._lock, self._db:
+                self._db.execute('DELETE FROM trends')
+                self._db.executemany('INSERT INTO trends (user_id, ts, polarity, mask) VALUES (?, ?, ?, ?)', rows)
+                self._series, self._synced = {}, 0
+                self._sync()
+            return
+        series = {}
+        offset = 0
+        for user, size in zip(data['users'], data['sizes']):
+            s = _Series(max(16, int(size)))
+            end = offset + int(size)
+            s.ts[:size], s.polarity[:size], s.mask[:size] = (data['ts'][offset:end], data['polarity'][offset:end],
+                                                             data['mask'][offset:end])
+            s.size = int(size)
+            series[str(user)] = s
+            offset = end
+        with self._lock:
+            self._series = series
+
+    def _open(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(self.SCHEMA)
+        with self._db:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'themes'").fetchone()
+            if row is None:
+                self._db.execute("INSERT INTO meta VALUES ('themes', ?)", (json.dumps(self.matcher.themes),))
+            else:
+                themes = json.loads(row[0])
+                if themes != self.matcher.themes[:len(themes)]:
+                    raise ValueError("theme order in the trend database does not match THEMES")
+                if len(themes) < len(self.matcher.themes):
+                    self._db.execute("UPDATE meta SET value = ? WHERE key = 'themes'",
+                                     (json.dumps(self.matcher.themes),))
+        self._sync()
+
+    def _sync(self):
+        """Pull points appended to the database since the last sync (by any process)"""
+        if self._db is None:
+            return
+        rows = self._db.execute('SELECT id, user_id, ts, polarity, mask FROM trends WHERE id > ? ORDER BY id',
+                                (self._synced,)).fetchall()
+        for _, user_id, ts, polarity, mask in rows:
+            self._append(user_id, ts, polarity, mask)
+        if rows:
+            self._synced = rows[-1][0]
+
+    def _append(self, user_id: str, ts: float, polarity: float, mask: int):
+        series = self._series.get(user_id)
+        if series is None:
+            series = self._series[user_id] = _Series()
+        series.append(ts, polarity, mask)
+
+    def _window(self, user_id: str, days: Optional[float], now: Optional[float]) -> Optional[Tuple]:
+        self._sync()
+        series = self._series.get(user_id)
+        if series is None or not series.size:
+            return None
+        since = None if days is None else (time.time() if now is None else now) - days * DAY
+        return series.window(since, None)
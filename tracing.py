@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_current = ContextVar('voicemind_trace', default=None)
+
+
+class Span:
+    """One timed pipeline stage (monotonic clock)"""
+
+    __slots__ = ('trace', 'name', 'start', 'end', 'attrs')
+
+    def __init__(self, trace: 'Trace', name: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = self.end = 0.0
+
+    def set(self, **attrs):
+        """Attach attributes (e.g. token usage) to the span"""
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace.spans.append(self)
+        return False
+
+
+class _NullSpan:
+    """Stand-in used when nothing is being traced"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def timings(self) -> dict:
+        """
+        Per-stage wall time for the response
+
+        Returns:
+            dict: {'total_ms', 'stages': {stage: ms}, 'usage': {token counts}}
+                (repeated stages are summed)
+        """
+        end = self.end if self.end is not None else time.perf_counter()
+        stages, usage = {}, {}
+        for span in self.spans:
+            stages[span.name] = round(stages.get(span.name, 0.0) + span.duration_ms, 2)
+            for key in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+                if key in span.attrs:
+                    usage[key] = usage.get(key, 0) + span.attrs[key]
+        return {'total_ms': round((end - self.start) * 1000, 2), 'stages': stages, 'usage': usage}
+
+
+class SpanExporter:
+    """Receives every finished trace; the default drops them"""
+
+    def export(self, trace: Trace):
+        pass
+
+
+class LogExporter(SpanExporter):
+    """Print each trace as one JSON line"""
+
+    def export(self, trace: Trace):
+        print(json.dumps({
+            'trace': trace.name,
+            'spans': [{'name': s.name, 'ms': round(s.duration_ms, 2), **s.attrs} for s in trace.spans],
+            **trace.timings()
+        }))
+
+
+_exporter = LogExporter() if os.getenv('VOICEMIND_TRACE') == 'log' else SpanExporter()
+
+
+def set_exporter(exporter: Optional[SpanExporter]):
+    """Install a process-wide exporter (None restores the no-op default)"""
+    global _exporter
+    _exporter = exporter or SpanExporter()
+
+
+def current() -> Optional[Trace]:
+    """Trace active in this context, if any"""
+    return _current.get()
+
+
+@contextmanager
+def trace(name: str, enabled: Optional[bool] = None) -> Iterator[Optional[Trace]]:
+    """
+    Trace a request
+
+    Joins the trace already active in this context; otherwise starts one if
+    enabled (default: only when a real exporter is installed). Yields None
+    when nothing is traced, so the no-op path records nothing.
+    """
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+    if enabled is None:
+        enabled = type(_exporter) is not SpanExporter
+    if not enabled:
+        yield None
+        return
+
+    new = Trace(name)
+    token = _current.set(new)
+    try:
+        yield new
+    finally:
+        _current.reset(token)
+        new.end = time.perf_counter()
+        _exporter.export(new)
+
+
+def span(name: str, **attrs):
+    """Time a stage of the active trace (a shared no-op when not tracing)"""
+    active = _current.get()
+    if active is None:
+        return _NULL_SPAN
+    return Span(active, name, attrs)
+
+
+def record_usage(s, response):
+    """Copy token usage from an OpenAI response onto a span"""
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        s.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens,
+              total_tokens=usage.total_tokens)
@@ -0,0 +1,208 @@
+import sys
+from collections import Counter, deque
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+class Turn:
+    """One journal message"""
+
+    __slots__ = ('role', 'text', 'phase', 'sentiment', 'analysis')
+
+    def __init__(self, role: str, text: str, phase: str, sentiment: Optional[str] = None):
+        self.role = role
+        self.text = text
+        self.phase = phase
+        self.sentiment = sentiment
+        self.analysis = None
+
+    def line(self) -> str:
+        """Transcript line as sent to the LLM ("User: ...")"""
+        return f"{self.role.title()}: {self.text}"
+
+    def to_dict(self) -> dict:
+        entry = {'role': self.role, 'text': self.text, 'phase': self.phase}
+        if self.sentiment is not None:
+            entry['sentiment'] = self.sentiment
+        if self.analysis is not None:
+            entry['analysis'] = self.analysis
+        return entry
+
+
+class Transcript:
+    """
+    Journal session transcript indexed by phase
+
+    Keeps per-phase and per-role counters so phase transitions never rescan
+    the session, and a ring buffer with the token cost of the newest lines,
+    so context is measured once per turn instead of once per request. The
+    lines themselves are rendered from the turns when a prompt is built;
+    only lines that prepare shortened are kept as text.
+    """
+
+    def __init__(self, window: int, prepare: Optional[Callable[[str], Tuple[str, int]]] = None):
+        """
+        Args:
+            window: Recent lines kept ready for the prompt
+            prepare: Maps a line to (prompt text, token cost), run once per turn
+        """
+        self.turns: List[Turn] = []
+        self.recent_costs = deque(maxlen=window)
+        self._cut = {}  # turn index -> shortened prompt line, for turns in the window
+        self.phase_counts = Counter()
+        self.role_counts = Counter()
+        self.prepare = prepare or (lambda line: (line, 0))
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self.turns)
+
+    def append(self, role: str, text: str, phase: str, sentiment: Optional[str] = None) -> Turn:
+        turn = Turn(role, text, phase, sentiment)
+        self.turns.append(turn)
+        self.phase_counts[phase] += 1
+        self.role_counts[role] += 1
+        index = len(self.turns) - 1
+        full = turn.line()
+        line, cost = self.prepare(full)
+        self.recent_costs.append(cost)
+        if line != full:
+            self._cut[index] = line
+        self._cut.pop(index - self.recent_costs.maxlen, None)
+        return turn
+
+    def recent(self) -> List[Tuple[str, int]]:
+        """Newest lines as prepared for the prompt: (prompt text, token cost), oldest first"""
+        start = len(self.turns) - len(self.recent_costs)
+        prepared = []
+        for index, cost in enumerate(self.recent_costs, start):
+            line = self._cut.get(index)
+            prepared.append((self.turns[index].line() if line is None else line, cost))
+        return prepared
+
+    def count(self, phase: str) -> int:
+        """Messages recorded in a phase"""
+        return self.phase_counts[phase]
+
+    def last(self, role: str) -> Optional[Turn]:
+        """Newest turn from a role"""
+        for turn in reversed(self.turns):
+            if turn.role == role:
+                return turn
+        return None
+
+    def lines(self) -> List[str]:
+        """Every transcript line in order"""
+        return [t.line() for t in self.turns]
+
+    def nbytes(self) -> int:
+        """Approximate RAM held by the transcript"""
+        size = sys.getsizeof(self.turns) + sys.getsizeof(self.recent_costs) + sys.getsizeof(self._cut)
+        for t in self.turns:
+            size += sys.getsizeof(t) + sys.getsizeof(t.text)
+            if t.analysis is not None:
+                size += sys.getsizeof(t.analysis)
+        for line in self._cut.values():
+            size += sys.getsizeof(line)
+        return size
+
+
+class SessionAnalysis:
+    """
+    Running aggregate of the per-turn journal analyses
+
+    Updated as each turn is analysed, so summarising a session never
+    re-analyses its messages.
+    """
+
+    # Weight of the newest turn in the recent-polarity average
+    TREND_ALPHA = 0.3
+    TREND_MARGIN = 0.1
+
+    def __init__(self):
+        self.themes = Counter()
+        self.tones = Counter()
+        self.turns = 0
+        self.polarity_sum = 0.0
+        self.recent_polarity = None
+
+    def add(self, analysis: dict):
+        """Fold one turn's analysis into the session totals"""
+        self.add_themes(analysis.get('themes', []))
+        self.tones[analysis['emotional_tone']] += 1
+        polarity = analysis['polarity_score']
+        self.turns += 1
+        self.polarity_sum += polarity
+        if self.recent_polarity is None:
+            self.recent_polarity = polarity
+        else:
+            self.recent_polarity += self.TREND_ALPHA * (polarity - self.recent_polarity)
+
+    def add_themes(self, themes: List[str]):
+        self.themes.update(themes)
+
+    @property
+    def mean_polarity(self) -> float:
+        return self.polarity_sum / self.turns if self.turns else 0.0
+
+    def trend(self) -> str:
+        """'improving', 'declining' or 'steady' (recent turns vs the session average)"""
+        if self.turns < 2:
+            return 'steady'
+        delta = self.recent_polarity - self.mean_polarity
+        if delta > self.TREND_MARGIN:
+            return 'improving'
+        if delta < -self.TREND_MARGIN:
+            return 'declining'
+        return 'steady'
+
+    def state(self) -> dict:
+        """Raw counters for a checkpoint"""
+        return {'themes': dict(self.themes), 'tones': dict(self.tones), 'turns': self.turns,
+                'polarity_sum': self.polarity_sum, 'recent_polarity': self.recent_polarity}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'SessionAnalysis':
+        analysis = cls()
+        analysis.themes.update(state['themes'])
+        analysis.tones.update(state['tones'])
+        analysis.turns = state['turns']
+        analysis.polarity_sum = state['polarity_sum']
+        analysis.recent_polarity = state['recent_polarity']
+        return analysis
+
+    def to_dict(self) -> dict:
+        return {
+            'themes': dict(self.themes.most_common()),
+            'tones': dict(self.tones),
+            'average_polarity': round(self.mean_polarity, 2),
+            'trend': self.trend()
+        }
+
+
+class ChunkSummaries:
+    """
+    Map-reduce summaries of a transcript
+
+    Fixed-size chunks of turns are summarised as the session goes on; once
+    there are too many chunk summaries the older ones are merged, so the
+    final summary always starts from a bounded input.
+    """
+
+    def __init__(self, chunk: int):
+        """
+        Args:
+            chunk: Transcript entries per chunk summary
+        """
+        self.chunk = chunk
+        self.summaries: List[str] = []
+        self.covered = 0
+        self.future = None
+
+    def due(self, n_turns: int) -> bool:
+        """Whether a full chunk of turns is waiting to be summarised"""
+        return n_turns - self.covered >= self.chunk
+
+    def busy(self) -> bool:
+        return self.future is not None and not self.future.done()
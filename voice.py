@@ -1,9 +1,14 @@
-import os
-import requests
+import time
 from io import BytesIO
-from dotenv import load_dotenv
-from openai import OpenAI
-load_dotenv()
+from typing import TYPE_CHECKING, Optional
+from clients import Config, get_config, get_http_session
+from deadline import DEFAULT_TIMEOUT
+
+if TYPE_CHECKING:
+    import requests
+    from openai import OpenAI
+
+
 class VoiceEngine:
     """Handles all voice processing - STT and TTS using ElevenLabs"""
     
@@ -13,12 +18,21 @@ class VoiceEngine:
         'pt': 'portuguese'
     }
     
-    def __init__(self):
-        """Initialize voice engine with API keys"""
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        self.elevenlabs_key = os.getenv("ELEVENLABS_API_KEY")
-        self.male_voice_id = os.getenv("MALE_VOICE_ID")
-        self.female_voice_id = os.getenv("FEMALE_VOICE_ID")
+    def __init__(self, config: Optional[Config] = None, openai_client: Optional['OpenAI'] = None,
+                 session: Optional['requests.Session'] = None):
+        """
+        Initialize voice engine with API keys
+        
+        Args:
+            config: Shared settings (default: clients.get_config())
+            openai_client: Shared OpenAI client (created when not given)
+            session: Keep-alive HTTP session for ElevenLabs (default: clients.get_http_session())
+        """
+        config = config or get_config()
+        self.openai_key = config.openai_api_key
+        self.elevenlabs_key = config.elevenlabs_api_key
+        self.male_voice_id = config.male_voice_id
+        self.female_voice_id = config.female_voice_id
         
         # Validate API keys
         if not self.openai_key:
@@ -28,15 +42,20 @@ class VoiceEngine:
         if not self.male_voice_id or not self.female_voice_id:
             raise ValueError("❌ Voice IDs not found in .env file!")
         
-        self.openai_client = OpenAI(api_key=self.openai_key)
+        if openai_client is None:
+            from openai import OpenAI
+            openai_client = OpenAI(api_key=self.openai_key)
+        self.openai_client = openai_client
+        self.session = session or get_http_session()
         print("VoiceEngine initialized successfully")
     
-    def speech_to_text(self, audio_data: bytes) -> dict:
+    def speech_to_text(self, audio_data: bytes, timeout: Optional[float] = None) -> dict:
         """
         Convert speech to text using ElevenLabs STT API
         
         Args:
             audio_data: Audio file bytes (WAV format)
+            timeout: Seconds to wait for the transcript (default: DEFAULT_TIMEOUT)
         
         Returns:
             dict: {'text': str, 'language': str}
@@ -56,7 +75,8 @@ class VoiceEngine:
             files = {"file": ("audio.wav", audio_file, "audio/wav")}
             data = {"model_id": "scribe_v1"}
             
-            response = requests.post(url, headers=headers, files=files, data=data)
+            response = self.session.post(url, headers=headers, files=files, data=data,
+                                         timeout=timeout or DEFAULT_TIMEOUT)
             
             if response.status_code != 200:
                 print(f"❌ ElevenLabs STT Error: {response.status_code}")
@@ -78,7 +98,8 @@ class VoiceEngine:
             print(f"❌ STT Error: {e}")
             return {'text': '', 'language': 'en'}
     
-    def text_to_speech(self, text: str, language: str = 'en', gender: str = 'female') -> bytes:
+    def text_to_speech(self, text: str, language: str = 'en', gender: str = 'female',
+                       timeout: Optional[float] = None) -> bytes:
         """
         Convert text to speech using ElevenLabs TTS API
         
@@ -86,6 +107,8 @@ class VoiceEngine:
             text: Text to convert
             language: Language code ('en', 'hi', 'pt')
             gender: 'male' or 'female'
+            timeout: Seconds for the whole download (default: DEFAULT_TIMEOUT);
+                b'' is returned if the stream does not finish in time
         
         Returns:
             bytes: Audio data in WAV format
@@ -115,7 +138,9 @@ class VoiceEngine:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=payload, stream=True)
+            timeout = timeout or DEFAULT_TIMEOUT
+            expires_at = time.monotonic() + timeout
+            response = self.session.post(url, headers=headers, json=payload, stream=True, timeout=timeout)
             
             if response.status_code != 200:
                 print(f"❌ ElevenLabs TTS Error: {response.status_code}")
@@ -127,6 +152,11 @@ class VoiceEngine:
             for chunk in response.iter_content(chunk_size=4096):
                 if chunk:
                     audio_chunks.append(chunk)
+                # The read timeout is per chunk, so cap the whole stream here
+                if time.monotonic() > expires_at:
+                    response.close()
+                    print(f"❌ TTS timed out after {timeout:.1f}s")
+                    return b''
             
             audio_data = b''.join(audio_chunks)
             return audio_data
@@ -174,11 +204,11 @@ class VoiceEngine:
     
 
 
-import pyaudio
-import wave
-
 def record_audio(duration: int = 5) -> bytes:
     """Record audio from microphone for specified duration"""
+    import pyaudio
+    import wave
+
     print(f"🎤 Recording for {duration} seconds...")
     
     CHUNK = 1024